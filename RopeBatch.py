@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import RopeGeometry as geo
+
+# Headless rope generation.
+# Builds hulls and fits rings for many objects across a process pool without
+# a Maya session. Results can be written to disk or handed to
+# RopeTool.importBatchResults inside Maya.
+#
+# Spec (json):
+# {
+#     "objects": [{"name": "post01", "obj": "post01.obj"},
+#                 {"name": "post02", "vertices": [[x, y, z], ...]}],
+#     "heights": [0.25, 0.5, 0.75],
+#     "relativeHeights": true,
+#     "subdivisions": 14,
+#     "radius": 0.05,
+#     "profileSides": 8,
+#     "samplesPerSpan": 4
+# }
+# Every top level setting can be overridden per object.
+
+DEFAULTS = {
+    "heights": [0.5],
+    "relativeHeights": True,
+    "subdivisions": 14,
+    "radius": 0.05,
+    "profileSides": 8,
+    "samplesPerSpan": 4,
+}
+
+
+def loadSpec(path):
+    with open(path) as specFile:
+        spec = json.load(specFile)
+    root = os.path.dirname(os.path.abspath(path))
+    for item in spec.get("objects", []):
+        if "obj" in item and not os.path.isabs(item["obj"]):
+            item["obj"] = os.path.join(root, item["obj"])
+    return spec
+
+def createJobs(spec):
+    settings = dict(DEFAULTS)
+    settings.update({key: value for key, value in spec.items() if key != "objects"})
+    jobs = []
+    for index, item in enumerate(spec.get("objects", [])):
+        job = dict(settings)
+        job.update(item)
+        job.setdefault("name", "Object_%d" % index)
+        jobs.append(job)
+    return jobs
+
+def buildObject(job):
+    # Worker: hull, rings and sweep tubes for a single object
+    start = time.perf_counter()
+    if "vertices" in job:
+        vertices = np.asarray(job["vertices"], dtype=np.float64)
+    else:
+        vertices = geo.readObjVertices(job["obj"])
+    hull = geo.computeHull(vertices)
+    hullTime = time.perf_counter() - start
+
+    heights = np.asarray(job["heights"], dtype=np.float64)
+    if job["relativeHeights"]:
+        low, high = hull.points[:, 1].min(), hull.points[:, 1].max()
+        heights = low + (high - low) * heights
+
+    subdivisions = int(job["subdivisions"])
+    cache = geo.HullSliceCache(hull)
+    starts = np.concatenate([geo.ringStart(hull, subdivisions, height) for height in heights])
+    fitted, hits = cache.project(starts)
+    rings = fitted.reshape(len(heights), subdivisions, 3)
+    hits = hits.reshape(len(heights), subdivisions)
+
+    tubes = [geo.sweepTube(geo.evaluatePeriodicBSpline(ring, int(job["samplesPerSpan"])),
+                           float(job["radius"]), int(job["profileSides"]))
+             for ring in rings]
+    tubePoints, tubeCounts, tubeConnects = geo.mergeMeshes(tubes)
+
+    return {
+        "name": job["name"],
+        "heights": heights,
+        "rings": rings,
+        "hits": hits,
+        "hullPoints": hull.points,
+        "hullFaceCounts": hull.faceCounts,
+        "hullFaceConnects": hull.faceConnects,
+        "tubePoints": tubePoints,
+        "tubeCounts": tubeCounts,
+        "tubeConnects": tubeConnects,
+        "hullTime": hullTime,
+        "totalTime": time.perf_counter() - start,
+    }
+
+def runBatch(spec, workers=None):
+    jobs = createJobs(spec)
+    if workers == 1 or len(jobs) < 2:
+        return [buildObject(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(buildObject, jobs))
+
+def writeResults(results, directory):
+    # One .npz per object for Maya, plus an .obj with tubes and ring polylines
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    for result in results:
+        arrays = {key: value for key, value in result.items() if isinstance(value, np.ndarray)}
+        np.savez_compressed(os.path.join(directory, result["name"] + ".npz"), **arrays)
+        curves = [("%s_Rope_%d" % (result["name"], index), ring)
+                  for index, ring in enumerate(result["rings"])]
+        geo.writeObj(os.path.join(directory, result["name"] + ".obj"),
+                     meshes=[("SM_" + result["name"], result["tubePoints"],
+                              result["tubeCounts"], result["tubeConnects"])],
+                     curves=curves)
+
+def loadResults(directory):
+    results = []
+    for fileName in sorted(os.listdir(directory)):
+        if fileName.endswith(".npz"):
+            with np.load(os.path.join(directory, fileName)) as data:
+                result = {key: data[key] for key in data.files}
+            result["name"] = fileName[:-len(".npz")]
+            results.append(result)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate rope rings and sweep tubes without Maya.")
+    parser.add_argument("spec", help="json batch spec")
+    parser.add_argument("-o", "--output", default="rope_batch", help="output directory")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes, defaults to all cores")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = runBatch(loadSpec(args.spec), args.workers)
+    writeResults(results, args.output)
+    for result in results:
+        print("%s: %d rings, %d hull faces, hull %.3fs, total %.3fs" % (
+            result["name"], len(result["rings"]), len(result["hullFaceCounts"]),
+            result["hullTime"], result["totalTime"]))
+    print("Batch finished in %.3fs" % (time.perf_counter() - start))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1107 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import types
+from collections import defaultdict
+
+import numpy as np
+
+import RopeGeometry as geo
+
+# Benchmarks for the rope tool outside of Maya.
+# A small recording stand-in for maya.cmds, maya.mel and maya.api.OpenMaya is
+# installed before RopeTool is imported. It keeps just enough scene state for
+# the tool's code paths to run and counts every command round trip, so each
+# scenario reports wall time next to the number of Maya calls it needed.
+#
+#     python RopeBenchmark.py -o bench.json
+#
+# Wall times include the stand-in's own Python cost and are only comparable
+# between runs of this script, the call counts are exact.
+
+
+class Recorder(object):
+    def __init__(self):
+        self.calls = defaultdict(int)
+
+    def record(self, name):
+        self.calls[name] += 1
+
+    def reset(self):
+        self.calls = defaultdict(int)
+
+    def snapshot(self):
+        return dict(self.calls)
+
+    def total(self):
+        return sum(self.calls.values())
+
+
+class FakeScene(object):
+    def __init__(self):
+        self.nodes = {}
+        self.selection = []
+        self.deferred = []
+        self.timers = []
+        self.events = {}
+        self.controls = {}
+        self.counter = 0
+        self.jobs = set()
+
+    def unique(self, name):
+        name = str(name).replace(" ", "")
+        if name not in self.nodes:
+            return name
+        self.counter += 1
+        while "%s%d" % (name, self.counter) in self.nodes:
+            self.counter += 1
+        return "%s%d" % (name, self.counter)
+
+    def add(self, name, kind, **data):
+        name = self.unique(name)
+        node = {"type": kind, "position": np.zeros(3), "shape": None}
+        node.update(data)
+        self.nodes[name] = node
+        return name
+
+    def add_mesh(self, name, points, counts=(), connects=()):
+        transform = self.add(name, "transform")
+        shape = self.add(transform + "Shape", "mesh", points=np.asarray(points, dtype=np.float64),
+                         counts=np.asarray(counts, dtype=np.int64),
+                         connects=np.asarray(connects, dtype=np.int64), equations=None, parent=transform)
+        self.nodes[transform]["shape"] = shape
+        return transform
+
+    def resolve(self, name):
+        # transform or shape name (possibly a list, a component or a dag path) to a node
+        if isinstance(name, (list, tuple)):
+            name = name[0]
+        name = str(name).split(".")[0].split("|")[-1]
+        return name, self.nodes.get(name)
+
+    def shape(self, name):
+        name, node = self.resolve(name)
+        if node is not None and node["shape"] is not None:
+            return node["shape"], self.nodes[node["shape"]]
+        return name, node
+
+    def fire(self, event):
+        # runOnce jobs of an event, like Maya they are gone after firing
+        for callback in self.events.pop(event, []):
+            callback()
+
+    def sweepFaces(self, sweepNode):
+        # faces a sweep node generates at its current resolution
+        node = self.nodes[sweepNode]
+        attributes = node["attributes"]
+        return attributes["profilePolySides"] * attributes["interpolationSteps"] * sum(node["spans"])
+
+    def run_deferred(self, once=False):
+        # once runs a single idle pass, like maya between two drag events
+        while self.deferred:
+            pending, self.deferred = self.deferred, []
+            for command in pending:
+                command()
+            if once:
+                break
+
+    def run_timers(self):
+        # Qt single shots in the order they are due, waiting in real time like the event loop.
+        # Returns how many ran.
+        count = 0
+        while self.timers:
+            self.timers.sort(key=lambda timer: timer[0])
+            due, command = self.timers.pop(0)
+            time.sleep(max(due - time.perf_counter(), 0.0))
+            command()
+            count += 1
+        return count
+
+    def add_timer(self, milliseconds, command):
+        self.timers.append((time.perf_counter() + milliseconds / 1000.0, command))
+
+
+class FakeModule(types.ModuleType):
+    # Module whose attributes are recorded calls, unknown commands return None
+    def __init__(self, name, recorder, implementation):
+        types.ModuleType.__init__(self, name)
+        self._recorder = recorder
+        self._implementation = implementation
+
+    def __getattr__(self, attribute):
+        if attribute.startswith("__"):
+            raise AttributeError(attribute)
+        function = getattr(self._implementation, attribute, None)
+        recorder = self._recorder
+        key = self.__name__.split(".")[-1] + "." + attribute
+
+        def command(*args, **kwargs):
+            recorder.record(key)
+            if function is None:
+                return None
+            return function(*args, **kwargs)
+        return command
+
+
+class FakeCmds(object):
+    def __init__(self, scene):
+        self.scene = scene
+
+    def polyEvaluate(self, object=None, v=False, **kwargs):
+        return len(self.scene.shape(object)[1]["points"])
+
+    def xform(self, target=None, q=False, t=False, ws=False, rp=False, cp=False, **kwargs):
+        target = target[0] if isinstance(target, (list, tuple)) else str(target)
+        if target.endswith(".vtx[*]"):
+            # every vertex as one flat list of floats
+            return self.scene.shape(target)[1]["points"].ravel().tolist()
+        if ".vtx[" in target:
+            index = int(target.split("[")[-1][:-1])
+            return self.scene.shape(target)[1]["points"][index].tolist()
+        name, node = self.scene.resolve(target)
+        if q and node is not None:
+            return node["position"].tolist()
+        if cp and node is not None and node["shape"] is not None:
+            points = self.scene.nodes[node["shape"]].get("points")
+            if points is not None and len(points):
+                node["position"] = (points.min(axis=0) + points.max(axis=0)) * 0.5
+        return None
+
+    def createNode(self, kind, name=None, **kwargs):
+        name = self.scene.add(name or kind, kind)
+        self.scene.selection = [name]
+        return name
+
+    def objectCenter(self, target, gl=True, **kwargs):
+        points = self.scene.shape(target)[1]["points"]
+        return ((points.min(axis=0) + points.max(axis=0)) * 0.5).tolist()
+
+    def exactWorldBoundingBox(self, target, **kwargs):
+        points = self.scene.shape(target)[1]["points"]
+        return points.min(axis=0).tolist() + points.max(axis=0).tolist()
+
+    def spaceLocator(self, p=(0, 0, 0), n="locator", a=True, **kwargs):
+        name = self.scene.add(n, "transform", position=np.asarray(p, dtype=np.float64))
+        self.scene.selection = [name]
+        return [name]
+
+    def listRelatives(self, target, shapes=False, parent=False, **kwargs):
+        name, node = self.scene.resolve(target)
+        if parent:
+            return [node["parent"]] if node is not None and node.get("parent") else None
+        if node is None or node["shape"] is None:
+            return None
+        return [node["shape"]]
+
+    def circle(self, normal=(0, 1, 0), r=1.0, s=8, n="nurbsCircle", **kwargs):
+        angles = np.linspace(0, 2 * np.pi, s, endpoint=False)
+        cvs = np.column_stack([np.cos(angles) * r, np.zeros(s), np.sin(angles) * r])
+        transform = self.scene.add(n, "transform")
+        shape = self.scene.add(transform + "Shape", "nurbsCurve",
+                               points=np.concatenate([cvs, cvs[:3]]), spans=s, parent=transform)
+        self.scene.nodes[transform]["shape"] = shape
+        self.scene.selection = [transform]
+        return [transform, self.scene.add("makeNurbCircle", "makeNurbCircle")]
+
+    def curve(self, n="curve", p=(), per=False, **kwargs):
+        transform = self.scene.add(n, "transform")
+        points = np.asarray(p, dtype=np.float64)
+        shape = self.scene.add(transform + "Shape", "nurbsCurve", points=points,
+                               spans=len(points) - 3 if per else len(points) - 1, parent=transform)
+        self.scene.nodes[transform]["shape"] = shape
+        return transform
+
+    def parentConstraint(self, driver, driven, mo=0, **kwargs):
+        # snaps the driven curve onto the driver like the real constraint would
+        position = self.scene.resolve(driver)[1]["position"]
+        name, node = self.scene.resolve(driven)
+        curve = self.scene.nodes[node["shape"]]
+        curve["points"] = curve["points"] - node["position"] + position
+        node["position"] = position.copy()
+        return [name + "_parentConstraint1"]
+
+    def pointPosition(self, component, w=True, **kwargs):
+        index = int(component.split("[")[-1][:-1])
+        return self.scene.shape(component)[1]["points"][index].tolist()
+
+    def move(self, x, y, z, component, **kwargs):
+        index = int(component.split("[")[-1][:-1])
+        node = self.scene.shape(component)[1]
+        node["points"][index] = x, y, z
+        if node["type"] == "nurbsCurve" and index < 3:
+            node["points"][node["spans"] + index] = x, y, z
+
+    def getAttr(self, attribute, **kwargs):
+        name, node = self.scene.shape(attribute)
+        if attribute.endswith(".spans"):
+            return node["spans"]
+        return node.get("attributes", {}).get(attribute.split(".", 1)[1], 0)
+
+    def setAttr(self, attribute, value, **kwargs):
+        name, node = self.scene.resolve(attribute)
+        node.setdefault("attributes", {})[attribute.split(".", 1)[1]] = value
+
+    def objExists(self, target):
+        return self.scene.resolve(target)[1] is not None
+
+    def select(self, *targets, **kwargs):
+        flat = []
+        for target in targets:
+            flat.extend(target if isinstance(target, (list, tuple)) else [target])
+        self.scene.selection = [str(target) for target in flat]
+
+    def ls(self, *targets, **kwargs):
+        if not targets:
+            return list(self.scene.selection)
+        if isinstance(targets[0], str) and targets[0].startswith("*."):
+            # nodes with an attribute, as plugs
+            attribute = targets[0][2:]
+            return ["%s.%s" % (name, attribute) for name, node in self.scene.nodes.items()
+                    if attribute in node.get("attributes", {})]
+        names = targets[0] if isinstance(targets[0], (list, tuple)) else targets
+        names = [name for name in names if self.scene.resolve(name)[1] is not None]
+        if kwargs.get("dag") or "type" in kwargs:
+            names = [self.scene.resolve(name)[0] for name in names]
+        if kwargs.get("dag"):
+            # the nodes and everything parented below them
+            found = list(names)
+            for name in found:
+                found.extend(child for child, node in self.scene.nodes.items()
+                             if node.get("parent") == name and child not in found)
+            names = found
+        if "type" in kwargs:
+            names = [name for name in names if self.scene.nodes[name]["type"] == kwargs["type"]]
+        return names
+
+    def addAttr(self, target, longName=None, **kwargs):
+        name, node = self.scene.resolve(target)
+        node.setdefault("attributes", {})[longName] = None
+
+    def delete(self, *targets, **kwargs):
+        if kwargs.get("ch"):
+            return
+        for target in targets:
+            for name in (target if isinstance(target, (list, tuple)) else [target]):
+                self.scene.nodes.pop(self.scene.resolve(name)[0], None)
+
+    def rename(self, old, new, **kwargs):
+        name, node = self.scene.resolve(old)
+        new = self.scene.unique(new)
+        if node is not None:
+            self.scene.nodes[new] = self.scene.nodes.pop(name)
+        return new
+
+    def group(self, *targets, **kwargs):
+        return self.scene.add(kwargs.get("n", kwargs.get("name", "group")), "transform")
+
+    def listHistory(self, target, future=False, type=None, **kwargs):
+        name, node = self.scene.resolve(target)
+        return list(node.get("outputs", [])) if node is not None else []
+
+    def scriptJob(self, *args, **kwargs):
+        if "exists" in kwargs:
+            return kwargs["exists"] in self.scene.jobs
+        if "kill" in kwargs:
+            self.scene.jobs.discard(kwargs["kill"])
+            return None
+        self.scene.counter += 1
+        self.scene.jobs.add(self.scene.counter)
+        if "event" in kwargs:
+            self.scene.events.setdefault(kwargs["event"][0], []).append(kwargs["event"][1])
+        return self.scene.counter
+
+    def evalDeferred(self, command, **kwargs):
+        self.scene.deferred.append(command)
+
+    def window(self, name, **kwargs):
+        return False if kwargs.get("exists") else name
+
+    def control(self, kind, args, kwargs):
+        # ui controls keep their value and selection so queries read them back
+        if args and (kwargs.get("q") or kwargs.get("e")):
+            control = self.scene.controls.setdefault(args[0], {})
+            if kwargs.get("q"):
+                if kwargs.get("si"):
+                    return list(control.get("selected", []))
+                return control.get("value", 0)
+            if "v" in kwargs:
+                control["value"] = kwargs["v"]
+            items = control.setdefault("items", [])
+            if kwargs.get("removeAll"):
+                del items[:]
+            if "removeItem" in kwargs:
+                items.remove(kwargs["removeItem"])
+            if "append" in kwargs:
+                append = kwargs["append"]
+                items.extend(append if isinstance(append, (list, tuple)) else [append])
+            return None
+        self.scene.counter += 1
+        name = "%s%d" % (kind, self.scene.counter)
+        self.scene.controls[name] = {"value": kwargs.get("value", 0)}
+        return name
+
+    def textScrollList(self, *args, **kwargs):
+        return self.control("textScrollList", args, kwargs)
+
+    def floatSliderGrp(self, *args, **kwargs):
+        return self.control("floatSliderGrp", args, kwargs)
+
+    def intSliderGrp(self, *args, **kwargs):
+        return self.control("intSliderGrp", args, kwargs)
+
+    def optionMenu(self, *args, **kwargs):
+        return 1 if kwargs.get("q") else "optionMenu"
+
+    def intFieldGrp(self, *args, **kwargs):
+        return 0 if kwargs.get("q") else "intFieldGrp"
+
+    def floatFieldGrp(self, *args, **kwargs):
+        # like maya, a value query returns all four fields
+        if kwargs.get("q"):
+            fields = self.scene.controls.get(args[0], {}).get("fields", [0.0] * 4)
+            if kwargs.get("value"):
+                return list(fields)
+            for index in range(4):
+                if kwargs.get("value%d" % (index + 1)):
+                    return fields[index]
+            return None
+        self.scene.counter += 1
+        name = "floatFieldGrp%d" % self.scene.counter
+        self.scene.controls[name] = {"fields": [float(kwargs.get("value%d" % (index + 1), 0.0))
+                                                for index in range(4)]}
+        return name
+
+
+class FakeMel(object):
+    def __init__(self, scene):
+        self.scene = scene
+
+    def eval(self, command):
+        if command.startswith("sweepMeshFromCurve"):
+            # one tube mesh per selected curve, like a real sweep with default settings
+            outputs = []
+            curveSpans = []
+            for curve in self.scene.selection:
+                cvs = self.scene.shape(curve)[1]["points"]
+                spans = self.scene.shape(curve)[1]["spans"]
+                curveSpans.append(spans)
+                tube = geo.sweepTube(geo.evaluatePeriodicBSpline(cvs[:spans], 4), 0.05, 8)
+                outputs.append(self.scene.shape(self.scene.add_mesh("sweptMesh", *tube))[0])
+            return self.scene.add("sweepMeshCreator", "sweepMeshCreator", outputs=outputs, spans=curveSpans,
+                                  attributes={"profilePolySides": 8, "interpolationSteps": 30})
+        return None
+
+
+def createOpenMaya(scene, recorder):
+    om = types.ModuleType("maya.api.OpenMaya")
+
+    class MSpace(object):
+        kWorld = 4
+        kObject = 2
+
+    class MPoint(tuple):
+        def __new__(cls, x=0.0, y=0.0, z=0.0, w=1.0):
+            return tuple.__new__(cls, (x, y, z, w))
+        x = property(lambda self: self[0])
+        y = property(lambda self: self[1])
+        z = property(lambda self: self[2])
+
+    class MPointArray(object):
+        # Like maya's array, every element read builds a new MPoint wrapper
+        def __init__(self, points):
+            self.points = points
+
+        def __len__(self):
+            return len(self.points)
+
+        def __getitem__(self, index):
+            if index >= len(self.points):
+                raise IndexError(index)
+            x, y, z = self.points[index]
+            return MPoint(float(x), float(y), float(z))
+
+    class MFloatVector(tuple):
+        def __new__(cls, x=0.0, y=0.0, z=0.0):
+            return tuple.__new__(cls, (x, y, z))
+
+    class MDagPath(object):
+        def __init__(self, name=None):
+            self.name = name
+
+        def extendToShape(self):
+            node = scene.nodes[self.name]
+            if node["shape"] is not None:
+                self.name = node["shape"]
+
+        def node(self):
+            return self.name
+
+    class MSelectionList(object):
+        def __init__(self):
+            self.items = []
+
+        def add(self, name):
+            recorder.record("om.MSelectionList.add")
+            self.items.append(scene.resolve(name)[0])
+
+        def getDagPath(self, index):
+            return MDagPath(self.items[index])
+
+        def getDependNode(self, index):
+            return self.items[index]
+
+    class MGlobal(object):
+        @staticmethod
+        def getSelectionListByName(name):
+            selection = MSelectionList()
+            selection.add(name)
+            return selection
+
+        @staticmethod
+        def getActiveSelectionList():
+            selection = MSelectionList()
+            for name in scene.selection:
+                selection.add(name)
+            return selection
+
+    class MFnMesh(object):
+        def __init__(self, dagPath=None):
+            self.name = None
+            if dagPath is not None:
+                self.name = scene.shape(dagPath.name)[0]
+
+        def create(self, vertices, counts, connects, parent=None):
+            recorder.record("om.MFnMesh.create")
+            shape = scene.add(parent + "Shape", "mesh", points=np.array(vertices, dtype=np.float64)[:, :3],
+                              counts=np.asarray(counts), connects=np.asarray(connects), equations=None,
+                              parent=parent)
+            scene.nodes[parent]["shape"] = shape
+            self.name = shape
+            return shape
+
+        def getPoints(self, space=MSpace.kObject):
+            recorder.record("om.MFnMesh.getPoints")
+            return MPointArray(scene.nodes[self.name]["points"])
+
+        def setPoints(self, vertices, space=MSpace.kObject):
+            recorder.record("om.MFnMesh.setPoints")
+            node = scene.nodes[self.name]
+            node["points"] = np.array(vertices, dtype=np.float64)[:, :3]
+            node["equations"] = None
+
+        def createInPlace(self, vertices, counts, connects):
+            recorder.record("om.MFnMesh.createInPlace")
+            node = scene.nodes[self.name]
+            node.update(points=np.array(vertices, dtype=np.float64)[:, :3], counts=np.asarray(counts),
+                        connects=np.asarray(connects), equations=None)
+
+        def updateSurface(self):
+            recorder.record("om.MFnMesh.updateSurface")
+
+        def getVertices(self):
+            recorder.record("om.MFnMesh.getVertices")
+            node = scene.nodes[self.name]
+            return node["counts"].tolist(), node["connects"].tolist()
+
+        def autoUniformGridParams(self):
+            recorder.record("om.MFnMesh.autoUniformGridParams")
+            return object()
+
+        def freeCachedIntersectionAccelerator(self):
+            recorder.record("om.MFnMesh.freeCachedIntersectionAccelerator")
+
+        def closestIntersection(self, source, direction, space, maxParam, testBoth, **kwargs):
+            recorder.record("om.MFnMesh.closestIntersection")
+            node = scene.nodes[self.name]
+            if node["equations"] is None:
+                node["equations"] = meshEquations(node["points"], node["counts"], node["connects"])
+            hit, mask = geo.intersectConvex(np.array([source[:3]]), np.array([direction[:3]]),
+                                            node["equations"], maxParam)
+            if not mask[0]:
+                return None
+            return MPoint(*hit[0]), 0.0, 0, 0, 0.0, 0.0
+
+    class MObject(object):
+        kNullObj = None
+
+    class MFnDependencyNode(object):
+        def __init__(self, node):
+            self.node = node
+
+        def setName(self, name):
+            recorder.record("om.MFnDependencyNode.setName")
+            new = scene.unique(name)
+            scene.nodes[new] = scene.nodes.pop(self.node)
+            shape = scene.nodes[new]["shape"]
+            if shape is not None:
+                scene.nodes[shape]["parent"] = new
+            return new
+
+    class MFnNurbsCurve(object):
+        kPeriodic = 3
+
+        def __init__(self, dagPath=None):
+            self.name = None
+            if dagPath is not None:
+                self.name = scene.shape(dagPath.name)[0]
+
+        def create(self, cvs, knots, degree, form, is2D, rational, parent=None):
+            # a new transform with the curve shape when no parent is given, like maya
+            recorder.record("om.MFnNurbsCurve.create")
+            points = np.array(cvs, dtype=np.float64)[:, :3]
+            transform = scene.add("curve", "transform")
+            self.name = scene.add("curveShape", "nurbsCurve", points=points,
+                                  spans=len(points) - degree if form == self.kPeriodic else len(points) - 1,
+                                  parent=transform)
+            scene.nodes[transform]["shape"] = self.name
+            return transform
+
+        def cvPositions(self, space=MSpace.kObject):
+            recorder.record("om.MFnNurbsCurve.cvPositions")
+            return [MPoint(*point) for point in scene.nodes[self.name]["points"].tolist()]
+
+        def setCVPositions(self, points, space=MSpace.kObject):
+            recorder.record("om.MFnNurbsCurve.setCVPositions")
+            scene.nodes[self.name]["points"] = np.array(points, dtype=np.float64)[:, :3]
+
+        def updateCurve(self):
+            recorder.record("om.MFnNurbsCurve.updateCurve")
+
+    class MNodeMessage(object):
+        @staticmethod
+        def addNodeDirtyCallback(node, function, *args):
+            recorder.record("om.MNodeMessage.addNodeDirtyCallback")
+            scene.counter += 1
+            return scene.counter
+
+    class MSceneMessage(object):
+        kBeforeSave = 0
+        kAfterOpen = 1
+        kAfterNew = 2
+
+        @staticmethod
+        def addCallback(message, function, *args):
+            recorder.record("om.MSceneMessage.addCallback")
+            scene.counter += 1
+            return scene.counter
+
+    class MMessage(object):
+        @staticmethod
+        def removeCallback(callback):
+            recorder.record("om.MMessage.removeCallback")
+
+    for item in (MSpace, MPoint, MPointArray, MFloatVector, MDagPath, MSelectionList, MGlobal, MObject, MFnDependencyNode,
+                 MFnMesh, MFnNurbsCurve, MNodeMessage, MSceneMessage, MMessage):
+        setattr(om, item.__name__, item)
+    om.MFloatPoint = MPoint
+    return om
+
+def meshEquations(points, counts, connects):
+    # Outward face planes of a convex triangle mesh
+    triangles = connects.reshape(-1, 3)
+    a, b, c = points[triangles[:, 0]], points[triangles[:, 1]], points[triangles[:, 2]]
+    normals = geo.normalized(np.cross(b - a, c - a))
+    offsets = -np.einsum('ij,ij->i', normals, a)
+    inward = normals @ points.mean(axis=0) + offsets > 0
+    normals[inward] *= -1
+    offsets[inward] *= -1
+    return np.column_stack([normals, offsets])
+
+
+class MayaStandIn(object):
+    def __init__(self):
+        self.recorder = Recorder()
+        self.scene = FakeScene()
+        self.cmds = FakeModule("maya.cmds", self.recorder, FakeCmds(self.scene))
+        self.mel = FakeModule("maya.mel", self.recorder, FakeMel(self.scene))
+        self.om = createOpenMaya(self.scene, self.recorder)
+
+    def install(self):
+        maya = types.ModuleType("maya")
+        api = types.ModuleType("maya.api")
+        maya.cmds, maya.mel, maya.api = self.cmds, self.mel, api
+        api.OpenMaya = self.om
+        sys.modules.update({"maya": maya, "maya.cmds": self.cmds, "maya.mel": self.mel,
+                            "maya.api": api, "maya.api.OpenMaya": self.om})
+        # maya's Qt binding, only single shot timers are used
+        qt = types.ModuleType("PySide6")
+        qt.QtCore = types.ModuleType("PySide6.QtCore")
+        scene = self.scene
+        class QTimer(object):
+            @staticmethod
+            def singleShot(milliseconds, command):
+                scene.add_timer(milliseconds, command)
+        qt.QtCore.QTimer = QTimer
+        sys.modules.update({"PySide6": qt, "PySide6.QtCore": qt.QtCore})
+
+
+# Scenarios
+def columnPoints(count, seed=0):
+    # Points on a noisy column surface, a stand in for a wrapped post
+    random = np.random.default_rng(seed)
+    angles = random.uniform(0, 2 * np.pi, count)
+    heights = random.uniform(0, 10, count)
+    radius = 1 + 0.05 * random.standard_normal(count)
+    return np.column_stack([np.cos(angles) * radius, heights, np.sin(angles) * radius])
+
+def vasePoints(count, seed=0):
+    # Noisy scan of a convex surface of revolution, the hull has short faces at every height
+    random = np.random.default_rng(seed)
+    angles = random.uniform(0, 2 * np.pi, count)
+    heights = random.uniform(0, 10, count)
+    radius = (1 + 0.5 * np.sin(np.pi * heights / 10)) * (1 - 0.02 * np.abs(random.standard_normal(count)))
+    return np.column_stack([np.cos(angles) * radius, heights, np.sin(angles) * radius])
+
+def boxPoints(count, seed=0):
+    # Corners and surface points of a 2 x 10 x 1 box, every slice is a rectangle
+    random = np.random.default_rng(seed)
+    points = random.uniform((-1, 0, -0.5), (1, 10, 0.5), (count, 3))
+    points[:8] = np.array(np.meshgrid((-1, 1), (0, 10), (-0.5, 0.5))).reshape(3, -1).T
+    axis = random.integers(0, 3, count)
+    low, high = np.array([-1, 0, -0.5]), np.array([1, 10, 0.5])
+    points[np.arange(count), axis] = np.where(random.random(count) < 0.5, low[axis], high[axis])
+    return points
+
+def measure(standIn, function):
+    standIn.recorder.reset()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    return result, seconds, standIn.recorder.snapshot()
+
+def record(scenario, seconds, calls, **parameters):
+    entry = {"scenario": scenario, "seconds": round(seconds, 6), "mayaCalls": sum(calls.values())}
+    entry.update(parameters)
+    entry["calls"] = calls
+    return entry
+
+def benchVertexFetch(standIn, RopeTool, counts, legacyLimit):
+    results = []
+    for count in counts:
+        mesh = [standIn.scene.add_mesh("Vertices%d" % count, columnPoints(count))]
+        _, seconds, calls = measure(standIn, lambda: RopeTool.getVertexPosition(mesh))
+        results.append(record("getVertexPosition", seconds, calls, vertices=count, path="bulk"))
+
+        def getPoints():
+            # the MPointArray conversion bulk used before
+            selection = standIn.om.MSelectionList()
+            selection.add(mesh[0])
+            dagPath = selection.getDagPath(0)
+            dagPath.extendToShape()
+            points = standIn.om.MFnMesh(dagPath).getPoints(standIn.om.MSpace.kWorld)
+            return np.array(points, dtype=np.float64)[:, :3]
+        _, seconds, calls = measure(standIn, getPoints)
+        results.append(record("getVertexPosition", seconds, calls, vertices=count, path="getPoints"))
+        if count <= legacyLimit:
+            _, seconds, calls = measure(standIn, lambda: RopeTool.getVertexPositionLegacy(mesh))
+            results.append(record("getVertexPosition", seconds, calls, vertices=count, path="legacy"))
+    return results
+
+def benchConvexHull(standIn, RopeTool, counts):
+    results = []
+    for count in counts:
+        points = columnPoints(count)
+        (convex, hull), seconds, calls = measure(
+            standIn, lambda: RopeTool.createConvexHull(points, ["Hull%d" % count]))
+        results.append(record("createConvexHull", seconds, calls, vertices=count, faces=hull.faceCount))
+    return results
+
+def benchHullModes(counts, modes=(("exact", {}), ("filtered", {}), ("approximate", {}),
+                                   ("approximate", {"maxError": 0.005}), ("approximate", {"maxFaces": 500}))):
+    # Maya free, compares build time and face count of every hull quality
+    results = []
+    for count in counts:
+        points = columnPoints(count)
+        for quality, options in modes:
+            hull = geo.computeHull(points, quality, **options)
+            entry = record("hullQuality", hull.buildTime, {}, vertices=count, quality=quality,
+                           faces=hull.faceCount, error=round(hull.error, 6))
+            entry.update(options)
+            results.append(entry)
+    return results
+
+def createSystem(standIn, RopeTool, tool, count):
+    mesh = [standIn.scene.add_mesh("Column%d" % count, columnPoints(count))]
+    return RopeTool.RopeSystem(mesh[0], mesh, tool)
+
+def benchRopes(standIn, RopeTool, tool, subdivisions, vertices, drags):
+    results = []
+    system = createSystem(standIn, RopeTool, tool, vertices)
+    for subdivision in subdivisions:
+        ring, seconds, calls = measure(standIn, lambda: system.create_rope(subdivisions=subdivision))
+        results.append(record("create_rope", seconds, calls, vertices=vertices, subdivisions=subdivision))
+
+        locator = standIn.scene.nodes[ring.locator[0]]
+        curve = standIn.scene.shape(ring.mesh)[1]
+
+        def drag():
+            for step in range(drags):
+                offset = np.array([0.0, 0.01, 0.0])
+                locator["position"] = locator["position"] + offset
+                curve["points"] = curve["points"] + offset
+                system.ray_ring(ring, True)
+        _, seconds, calls = measure(standIn, drag)
+        results.append(record("ray_ring", seconds / drags, {key: value / float(drags) for key, value in calls.items()},
+                              vertices=vertices, subdivisions=subdivision))
+    return results
+
+IMPORT_SCRIPT = '''
+import sys, time
+sys.path.insert(0, %r)
+import RopeBenchmark
+RopeBenchmark.MayaStandIn().install()
+start = time.perf_counter()
+import RopeTool
+seconds = time.perf_counter() - start
+print(seconds, "scipy.spatial" in sys.modules, getattr(RopeTool, "ropeTool", None) is not None)
+'''
+
+def benchImport(repeats=5):
+    # Fresh interpreter per run so nothing is cached between imports
+    times = []
+    for _ in range(repeats):
+        output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT % os.path.dirname(
+            os.path.abspath(__file__))]).decode().split()
+        times.append(float(output[-3]))
+    return [record("import", min(times), {}, scipyLoaded=output[-2] == "True",
+                   windowBuilt=output[-1] == "True")]
+
+def benchBatchImport(standIn, RopeTool, vertices, objects=4, rings=(10, 100)):
+    # Importing headless batch results, maya commands per object against rings created
+    import RopeBatch
+    results = []
+    for count in rings:
+        spec = {"heights": np.linspace(0.05, 0.95, count).tolist(),
+                "objects": [{"name": "Post%d_%d" % (count, index), "vertices": columnPoints(vertices, index)}
+                            for index in range(objects)]}
+        batch = RopeBatch.runBatch(spec, workers=1)
+        group, seconds, calls = measure(standIn, lambda: RopeTool.importBatchResults(batch))
+        commands = sum(number for call, number in calls.items() if call.startswith("cmds."))
+        results.append(record("batch import", seconds, calls, objects=objects, rings=count * objects,
+                              commands=commands, curvesCreated=calls.get("om.MFnNurbsCurve.create", 0)))
+    return results
+
+def benchCoil(standIn, RopeTool, tool, counts, vertices):
+    # A coil built ring by ring against one batched create_ropes call
+    results = []
+    for count in counts:
+        system = createSystem(standIn, RopeTool, tool, vertices)
+
+        def singles():
+            for _ in range(count):
+                system.create_rope()
+        _, seconds, calls = measure(standIn, singles)
+        results.append(record("coil", seconds, calls, vertices=vertices, rings=count, path="create_rope"))
+
+        _, seconds, calls = measure(standIn, lambda: system.create_ropes(count))
+        results.append(record("coil", seconds, calls, vertices=vertices, rings=count, path="create_ropes"))
+    return results
+
+def benchCombine(standIn, RopeTool, tool, counts, vertices):
+    results = []
+    for count in counts:
+        system = createSystem(standIn, RopeTool, tool, vertices)
+        for _ in range(count):
+            system.create_rope()
+        combined, seconds, calls = measure(standIn, lambda: system.combine_ropes())
+        faces = len(standIn.scene.shape(combined)[1]["counts"])
+        results.append(record("combine_ropes", seconds, calls, vertices=vertices, ropes=count, faces=faces))
+    return results
+
+def listBytes(positions):
+    # size of the per ring list of cv lists the rings used to keep
+    nested = np.asarray(positions).tolist()
+    return sys.getsizeof(nested) + sum(sys.getsizeof(cv) + sum(sys.getsizeof(v) for v in cv) for cv in nested)
+
+def ringDeviations(system, rings):
+    # Cvs and max distance to the hull slice of every ring
+    deviations = []
+    for ring in rings:
+        polygon = geo.slicePolygon(system.hull.points, system.sliceCache.edges,
+                                                    ring.positions[0, 1])
+        cvs = ring.positions[:, [0, 2]]
+        deviation, _, _ = geo.splineDeviation(
+            polygon, geo.polygonEquations(polygon), cvs)
+        deviations.append(deviation.max())
+    return [len(ring.positions) for ring in rings], deviations
+
+def benchAdaptive(standIn, RopeTool, tool, vertices, rings=20, tolerances=(0.01, 0.005)):
+    # Fixed 14 cv rings against rings fitted to a tolerance on a box and a round vase
+    results = []
+    for shape, points in (("box", boxPoints(vertices)), ("vase", vasePoints(vertices))):
+        mesh = [standIn.scene.add_mesh("%s%d" % (shape.capitalize(), vertices), points)]
+        system = RopeTool.RopeSystem(mesh[0], mesh, tool)
+        for tolerance in (None,) + tuple(tolerances):
+            created, seconds, calls = measure(standIn, lambda: system.create_ropes(rings, tolerance=tolerance))
+            counts, deviations = ringDeviations(system, created)
+            sweepFaces = sum(standIn.scene.sweepFaces(ring.sweepMesh) for ring in created)
+            results.append(record("adaptive", seconds, calls, shape=shape, tolerance=tolerance or 0,
+                                  rings=rings, cvs=sum(counts), maxCvs=max(counts),
+                                  maxDeviation=round(float(max(deviations)), 6), sweepFaces=sweepFaces))
+    return results
+
+def benchSystems(standIn, RopeTool, tool, vertices, posts=80):
+    # A fence line of posts, one system at a time against create_systems
+    results = []
+    for path in ("RopeSystem", "create_systems"):
+        names = [standIn.scene.add_mesh("Post%s%d" % (path, index), columnPoints(vertices, seed=index))
+                 for index in range(posts)]
+        if path == "RopeSystem":
+            function = lambda: [RopeTool.RopeSystem(name, [name], tool) for name in names]
+        else:
+            function = lambda: tool.create_systems(names)
+        systems, seconds, calls = measure(standIn, function)
+        results.append(record("systems", seconds, calls, posts=posts, vertices=vertices, path=path,
+                              workers=os.cpu_count() if path == "create_systems" else 1))
+    return results
+
+def benchRefit(standIn, RopeTool, tool, counts, vertices, subdivisions=14):
+    # Refitting every ring of a system one ray_ring at a time against one refit_rings pass
+    results = []
+    for count in counts:
+        system = createSystem(standIn, RopeTool, tool, vertices)
+        system.create_ropes(count, subdivisions=subdivisions)
+
+        def singles():
+            for ring in system.ropes:
+                system.ray_ring(ring, True)
+        _, seconds, calls = measure(standIn, singles)
+        results.append(record("refit", seconds, calls, rings=count, path="ray_ring"))
+
+        _, seconds, calls = measure(standIn, system.refit_rings)
+        storeBytes = system.ringStore.nbytes // len(system.ringStore)
+        legacyBytes = 2 * listBytes(system.ropes[0].positions)
+        results.append(record("refit", seconds, calls, rings=count, path="refit_rings",
+                              bytesPerRing=storeBytes, listBytesPerRing=legacyBytes))
+    return results
+
+def benchWatch(standIn, RopeTool, tool, vertices, rings=40, bulges=(0.02, 0.2)):
+    # Sculpting a bulge into the source mesh, incremental refresh against a full rebuild
+    results = []
+    for bulge in bulges:
+        mesh = [standIn.scene.add_mesh("Vase%d" % vertices, vasePoints(vertices))]
+        system = RopeTool.RopeSystem(mesh[0], mesh, tool)
+        system.create_ropes(rings)
+        shape = standIn.scene.shape(system.sourceObject)[1]
+        points = shape["points"].copy()
+        band = (points[:, 1] > 4.0) & (points[:, 1] < 5.0) & (points[:, 0] > 1.0)
+        points[band] += (points[band] * [1, 0, 1]) * bulge
+        shape["points"] = points
+
+        refitted, seconds, calls = measure(standIn, system.refresh_hull)
+        results.append(record("watch", seconds, calls, vertices=vertices, bulge=bulge, path="refresh_hull",
+                              rings=rings, refitted=len(refitted), faces=system.hull.faceCount,
+                              hullSeconds=round(system.hull.buildTime, 4)))
+
+        def rebuild():
+            hull = RopeTool.geo.computeHull(RopeTool.getVertexPosition(system.sourceObject))
+            system.sliceCache.update(hull)
+            system.refit_rings()
+            return hull
+        hull, seconds, calls = measure(standIn, rebuild)
+        results.append(record("watch", seconds, calls, vertices=vertices, bulge=bulge, path="rebuild",
+                              rings=rings, refitted=rings, hullSeconds=round(hull.buildTime, 4)))
+    return results
+
+def benchLod(standIn, RopeTool, tool, vertices, rings=10, drags=20, resolution=(32, 40)):
+    # Dragging a coil with dense sweeps, faces the sweep evaluates per tick with and without proxies
+    results = []
+    for enabled in (False, True):
+        tool.lod.enabled = enabled
+        system = createSystem(standIn, RopeTool, tool, vertices)
+        coil = system.create_ropes(rings)[0].coil
+        sweepMesh = system.ropes[0].sweepMesh
+        standIn.cmds.setAttr(sweepMesh + ".profilePolySides", resolution[0])
+        standIn.cmds.setAttr(sweepMesh + ".interpolationSteps", resolution[1])
+        locators = [standIn.scene.nodes[ring.locator[0]] for ring in system.ropes]
+        curves = [standIn.scene.shape(ring.mesh)[1] for ring in system.ropes]
+
+        def drag():
+            faces = 0
+            for step in range(drags):
+                offset = np.array([0.0, 0.01, 0.0])
+                for locator, curve in zip(locators, curves):
+                    locator["position"] = locator["position"] + offset
+                    curve["points"] = curve["points"] + offset
+                system.mark_coil(coil)
+                standIn.scene.run_deferred(once=True)
+                faces += standIn.scene.sweepFaces(sweepMesh)
+            standIn.scene.fire("DragRelease")
+            return faces
+        faces, seconds, calls = measure(standIn, drag)
+        released = standIn.scene.sweepFaces(sweepMesh)
+
+        # a typed channel box value moves the coil without any DragRelease
+        for locator in locators:
+            locator["position"] = locator["position"] + [0.0, 0.01, 0.0]
+        system.mark_coil(coil)
+        standIn.scene.run_deferred()
+        timers = standIn.scene.run_timers()
+        results.append(record("lod", seconds, calls, rings=rings, drags=drags, lod=enabled,
+                              facesPerTick=faces // drags, released=released,
+                              idleReleased=standIn.scene.sweepFaces(sweepMesh), releaseTimers=timers))
+    tool.lod.enabled = True
+    return results
+
+def benchSliders(standIn, RopeTool, tool, vertices, ropes=(1, 50), ticks=32, ticksPerFrame=4):
+    # Dragging the radius slider with every rope selected, dc events arrive faster than frames
+    results = []
+    for count in ropes:
+        system = createSystem(standIn, RopeTool, tool, vertices)
+        for _ in range(count):
+            system.create_rope()
+        tool.selectedSystem = system
+        tool.selectedRope = system.ropes[0]
+        standIn.scene.controls[tool.ropeList]["selected"] = [ring.name for ring in system.ropes]
+        tool.applier.interval = 0.0
+        tool.applier.reset_stats()
+
+        def drag():
+            for tick in range(ticks):
+                standIn.cmds.floatSliderGrp(tool.radius_sl, e=True, v=0.05 + 0.01 * tick)
+                tool.drag_slider_settings("radius")
+                if tick % ticksPerFrame == ticksPerFrame - 1:
+                    standIn.scene.run_timers()
+            tool.set_slider_settings("radius")
+        _, seconds, calls = measure(standIn, drag)
+        # the old dc queried six sliders and set seven attributes on one rope per event
+        results.append(record("sliders", seconds, calls, ropes=count, ticks=ticks,
+                              setAttr=calls.get("cmds.setAttr", 0), legacySetAttr=7 * ticks * count,
+                              undoChunks=calls.get("cmds.undoInfo", 0) // 2))
+    return results
+
+def benchRegistry(standIn, RopeTool, tool, systems=100, ropes=1000, lookups=200):
+    # Selection and list refresh with many systems and a system with many ropes
+    tool.packed_systems = []
+    tool.systemIndex = {}
+    mesh = [standIn.scene.add_mesh("Registry", columnPoints(1000))]
+    for _ in range(systems):
+        tool.register_system(RopeTool.RopeSystem(tool.unique_system_name(mesh[0]), mesh, tool))
+    system = tool.packed_systems[-1]
+    system.create_ropes(ropes)
+    tool.selectedSystem = system
+    systemsList = standIn.scene.controls[tool.systemsList]
+    ropeList = standIn.scene.controls[tool.ropeList]
+
+    results = []
+    _, seconds, calls = measure(standIn, tool.update_systems)
+    results.append(record("registry", seconds, calls, path="update_systems", items=len(systemsList["items"])))
+    _, seconds, calls = measure(standIn, tool.update_rope_ui)
+    results.append(record("registry", seconds, calls, path="update_rope_ui", items=len(ropeList["items"])))
+
+    def selectSystems():
+        for index in range(lookups):
+            systemsList["selected"] = [tool.packed_systems[index % systems].name]
+            tool.get_selected_system()
+    _, seconds, calls = measure(standIn, selectSystems)
+    results.append(record("registry", seconds / lookups, {}, path="select system", systems=systems))
+
+    tool.selectedSystem = system
+    tool.update_rope_ui()
+    def selectRopes():
+        for index in range(lookups):
+            ropeList["selected"] = [system.ropes[-1 - index].name]
+            tool.set_selected_rope()
+    _, seconds, calls = measure(standIn, selectRopes)
+    results.append(record("registry", seconds / lookups, {}, path="select rope", ropes=ropes))
+
+    tool.selectedRope = system.ropes[-1]
+    _, seconds, calls = measure(standIn, lambda: tool.delete_rope(None))
+    results.append(record("registry", seconds, calls, path="delete_rope", items=len(ropeList["items"])))
+
+    # names stay unique registry keys when ropes are added after a delete
+    tool.selectedRope = system.ropes[1]
+    tool.delete_rope(None)
+    tool.create_cable(None)
+    names = [ring.name for ring in system.ropes]
+    results.append(record("registry", 0.0, {}, path="create after delete", ropes=len(names),
+                          unique=len(set(names)) == len(names) == len(system.ropeIndex)
+                          and ropeList["items"] == names))
+
+    # a system created while another one is listed replaces the list before ropes are added
+    RopeTool.cmd.select(standIn.scene.add_mesh("RegistryB", columnPoints(1000)))
+    tool.createSystem(None)
+    tool.create_cable(None)
+    names = [ring.name for ring in tool.selectedSystem.ropes]
+    ropeList["selected"] = names[:1]
+    tool.set_selected_rope()
+    results.append(record("registry", 0.0, {}, path="create system while listed", ropes=len(names),
+                          listed=ropeList["items"] == names,
+                          selectable=tool.selectedRope is tool.selectedSystem.ropes[0]))
+    return results
+
+def benchState(standIn, RopeTool, tool, vertices, ropes=1000):
+    # Saving a system into the scene and rebinding it like after a reopen
+    system = createSystem(standIn, RopeTool, tool, vertices)
+    system.create_ropes(ropes // 2)
+    for _ in range(ropes - ropes // 2):
+        system.create_rope()
+    tool.packed_systems = [system]
+    tool.systemIndex = {system.name: system}
+
+    results = []
+    _, seconds, calls = measure(standIn, tool.save_state)
+    blob = standIn.scene.nodes[system.stateNode]["attributes"]["ropeState"]
+    results.append(record("state", seconds, calls, path="save", ropes=ropes, bytes=len(blob)))
+
+    restored, seconds, calls = measure(standIn, tool.scene_opened)
+    restoredSystem = tool.packed_systems[0]
+    matches = all(np.array_equal(old.positions, new.positions) and old.name == new.name
+                  for old, new in zip(system.ropes, restoredSystem.ropes))
+    results.append(record("state", seconds, calls, path="restore", ropes=len(restoredSystem.ropes),
+                          matches=matches))
+    return results
+
+def runBenchmarks(vertexCounts=(1000, 10000, 100000, 1000000), subdivisions=(14, 32, 64, 128, 256),
+                  ropeVertices=10000, drags=20, legacyLimit=100000):
+    standIn = MayaStandIn()
+    standIn.install()
+    import RopeTool
+    # measure real hull builds, not disk cache hits
+    RopeTool.hullCache = None
+    tool = RopeTool.RopeTool()
+
+    results = benchImport()
+    results += benchVertexFetch(standIn, RopeTool, vertexCounts, legacyLimit)
+    results += benchConvexHull(standIn, RopeTool, vertexCounts)
+    results += benchHullModes(vertexCounts)
+    results += benchRopes(standIn, RopeTool, tool, subdivisions, ropeVertices, drags)
+    results += benchBatchImport(standIn, RopeTool, ropeVertices)
+    results += benchCoil(standIn, RopeTool, tool, (10, 40), ropeVertices)
+    results += benchCombine(standIn, RopeTool, tool, (10, 100, 400), ropeVertices)
+    results += benchRefit(standIn, RopeTool, tool, (10, 100, 1000), ropeVertices)
+    results += benchWatch(standIn, RopeTool, tool, max(vertexCounts))
+    results += benchLod(standIn, RopeTool, tool, ropeVertices)
+    results += benchSliders(standIn, RopeTool, tool, ropeVertices)
+    results += benchRegistry(standIn, RopeTool, tool)
+    results += benchState(standIn, RopeTool, tool, ropeVertices)
+    results += benchAdaptive(standIn, RopeTool, tool, ropeVertices)
+    results += benchSystems(standIn, RopeTool, tool, ropeVertices)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rope tool against a Maya stand-in.")
+    parser.add_argument("-o", "--output", help="write the results as json to this file")
+    parser.add_argument("--vertices", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--subdivisions", type=int, nargs="+", default=[14, 32, 64, 128, 256])
+    parser.add_argument("--legacy-limit", type=int, default=100000,
+                        help="largest mesh to time with the per vertex fetch")
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.vertices, args.subdivisions, legacyLimit=args.legacy_limit)
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            json.dump(results, outputFile, indent=1)
+    for result in results:
+        parameters = " ".join("%s=%s" % (key, result[key]) for key in sorted(result)
+                              if key not in ("scenario", "seconds", "mayaCalls", "calls"))
+        print("%-18s %-36s %10.5fs %10g calls" % (result["scenario"], parameters,
+                                                  result["seconds"], result["mayaCalls"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
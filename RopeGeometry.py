@@ -0,0 +1,985 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Maya free geometry helpers for the rope tool.
+# Everything here works on plain NumPy arrays so it can run headless.
+# scipy.spatial is only imported the first time a hull is built.
+
+spatial = None
+
+def getSpatial():
+    global spatial
+    if spatial is None:
+        import scipy.spatial
+        spatial = scipy.spatial
+    return spatial
+
+
+class ConvexHullData(object):
+    def __init__(self, points, faceCounts, faceConnects, equations, sourceIndices=None):
+        # points: (V, 3) hull vertices, faces as Maya style counts/connects,
+        # equations: (F, 4) outward half-spaces with n . x + d <= 0 inside
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.faceCounts = np.ascontiguousarray(faceCounts, dtype=np.int32)
+        self.faceConnects = np.ascontiguousarray(faceConnects, dtype=np.int32)
+        self.equations = np.ascontiguousarray(equations, dtype=np.float64)
+        self.sourceIndices = sourceIndices
+        # build report, filled in by computeHull
+        self.quality = "exact"
+        self.error = 0.0
+        self.buildTime = 0.0
+        self.cached = False
+
+    @property
+    def center(self):
+        # Bounding box center, same as cmds.objectCenter on the hull mesh
+        return (self.points.min(axis=0) + self.points.max(axis=0)) * 0.5
+
+    @property
+    def faceCount(self):
+        return len(self.faceCounts)
+
+
+HULL_QUALITIES = ("exact", "filtered", "approximate")
+
+def computeHull(vertexPositions, quality="exact", maxFaces=None, maxError=None,
+                directions=64, mergeCoplanar=None):
+    # exact:       Qhull on every vertex, one triangle per simplex
+    # filtered:    same hull with coplanar triangles merged into n-gons
+    # approximate: hull of the extreme points along sampled directions, refined
+    #              until maxError and/or capped at maxFaces triangles, merged
+    if quality not in HULL_QUALITIES:
+        raise ValueError("Unknown hull quality: %s" % quality)
+    start = time.perf_counter()
+    points = np.asarray(vertexPositions, dtype=np.float64)
+    error = 0.0
+    if quality != "approximate":
+        # Qhull already skips interior points faster than a NumPy prefilter can
+        chull = getSpatial().ConvexHull(points)
+        sourceIds = np.arange(len(points))
+    else:
+        seeds = extremePoints(points, sampleDirections(directions))
+        seedHull = getSpatial().ConvexHull(points[seeds])
+        candidates = outsidePoints(points, seedHull.equations)
+        candidates = np.setdiff1d(candidates, seeds)
+        chull, sourceIds, error = refineHull(points, seeds, candidates, maxFaces, maxError)
+
+    hull = hullFromQhull(chull, sourceIds)
+    if mergeCoplanar is None:
+        mergeCoplanar = quality != "exact"
+    if mergeCoplanar:
+        hull = mergeCoplanarFaces(hull)
+    hull.quality = quality
+    hull.error = error
+    hull.buildTime = time.perf_counter() - start
+    return hull
+
+def cachedHull(vertexPositions, quality="exact", maxFaces=None, maxError=None, cache=None):
+    # computeHull behind an on disk cache keyed by the vertex buffer
+    if cache is None:
+        return computeHull(vertexPositions, quality, maxFaces, maxError)
+    points = np.ascontiguousarray(vertexPositions, dtype=np.float64)
+    key = cache.key(points, quality, maxFaces, maxError)
+    hull = cache.load(key)
+    if hull is None:
+        hull = computeHull(points, quality, maxFaces, maxError)
+        cache.store(key, hull)
+    return hull
+
+def cachedHulls(pointSets, quality="exact", maxFaces=None, maxError=None, cache=None, workers=None,
+                skipErrors=False):
+    # cachedHull for several meshes on a thread pool, Qhull drops the GIL while it runs.
+    # Threads rather than processes since Maya's interpreter cannot fork workers.
+    # With skipErrors a mesh that fails gets None and a warning, the others are kept.
+    def build(points):
+        try:
+            return cachedHull(points, quality, maxFaces, maxError, cache)
+        except Exception as error:
+            if not skipErrors:
+                raise
+            warnings.warn("Could not compute hull: %s" % error)
+            return None
+
+    if workers == 1 or len(pointSets) < 2:
+        return [build(points) for points in pointSets]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(build, pointSets))
+
+def movedVertices(previous, vertexPositions):
+    # Indices of vertices that changed, None when the vertex count changed
+    points = np.asarray(vertexPositions, dtype=np.float64)
+    if previous is None or len(previous) != len(points):
+        return None
+    return np.flatnonzero(np.any(points != previous, axis=1))
+
+def updateHull(hull, vertexPositions, moved=None, maxFaces=None, maxError=None, tolerance=1e-9):
+    # Hull after a deformation, None when the current hull still covers every vertex.
+    # Moved interior vertices only add their outside points to the old hull vertices.
+    # A moved hull vertex can uncover interior points, those can only surface inside
+    # the faces around it, so only the interior points in their bounds are added.
+    points = np.asarray(vertexPositions, dtype=np.float64)
+    if moved is None or hull.sourceIndices is None:
+        return computeHull(points, hull.quality, maxFaces, maxError)
+    if not len(moved):
+        return None
+    start = time.perf_counter()
+    sourceIds = np.asarray(hull.sourceIndices)
+    movedHull = np.isin(sourceIds, moved)
+    if movedHull.any():
+        if hull.quality == "approximate":
+            # the error bound covers every vertex, rebuilding is the only way to keep it
+            return computeHull(points, hull.quality, maxFaces, maxError)
+        faces = np.repeat(np.arange(hull.faceCount), hull.faceCounts)
+        touched = np.isin(faces, faces[movedHull[hull.faceConnects]])
+        corners = hull.points[hull.faceConnects[touched]]
+        low, high = corners.min(axis=0) - tolerance, corners.max(axis=0) + tolerance
+        local = np.flatnonzero(np.all((points >= low) & (points <= high), axis=1))
+        added = np.union1d(moved, local)
+    else:
+        distances, _ = outsideDistances(points[moved], hull.equations)
+        added = moved[distances > hull.error + tolerance]
+        if not len(added):
+            return None
+    sourceIds = np.union1d(sourceIds, added)
+    updated = hullFromQhull(getSpatial().ConvexHull(points[sourceIds]), sourceIds)
+    if hull.quality != "exact":
+        updated = mergeCoplanarFaces(updated)
+    updated.quality = hull.quality
+    updated.error = hull.error
+    updated.buildTime = time.perf_counter() - start
+    return updated
+
+def planeKeys(hull, scale, tolerance=1e-6):
+    # Face planes as hashable rows, coplanar faces share a key however they are triangulated
+    keys = np.column_stack([hull.equations[:, :3], hull.equations[:, 3] / scale])
+    keys = np.ascontiguousarray(np.round(keys / tolerance).astype(np.int64))
+    return keys.view(np.dtype((np.void, keys.itemsize * 4))).ravel()
+
+def faceHeights(hull):
+    heights = hull.points[hull.faceConnects, 1]
+    offsets = np.cumsum(hull.faceCounts) - hull.faceCounts
+    return np.minimum.reduceat(heights, offsets), np.maximum.reduceat(heights, offsets)
+
+def changedHeightRange(old, new, tolerance=1e-6):
+    # Height span of the faces whose plane is only on one of the hulls, None when both match.
+    # A horizontal ray hits both hulls at the same point unless it crosses such a face.
+    if not old.faceCount or not new.faceCount:
+        ys = np.concatenate([old.points[:, 1], new.points[:, 1]])
+        return ys.min(), ys.max()
+    points = np.concatenate([old.points, new.points])
+    scale = max(np.linalg.norm(points.max(axis=0) - points.min(axis=0)), 1e-12)
+    oldKeys = planeKeys(old, scale, tolerance)
+    newKeys = planeKeys(new, scale, tolerance)
+    lows = []
+    highs = []
+    for hull, keys, other in ((old, oldKeys, newKeys), (new, newKeys, oldKeys)):
+        changed = ~np.isin(keys, other)
+        if changed.any():
+            low, high = faceHeights(hull)
+            lows.append(low[changed].min())
+            highs.append(high[changed].max())
+    if not lows:
+        return None
+    return min(lows), max(highs)
+
+def hullFromQhull(chull, sourceIds=None):
+    # Compact the hull to its own vertices and wind every triangle outward
+    simplices = orientSimplices(chull.points, chull.simplices, chull.equations)
+    hullIndices = np.unique(simplices)
+    remap = np.full(len(chull.points), -1, dtype=np.int64)
+    remap[hullIndices] = np.arange(len(hullIndices))
+    sourceIndices = hullIndices if sourceIds is None else np.asarray(sourceIds)[hullIndices]
+    return ConvexHullData(chull.points[hullIndices],
+                          np.full(len(simplices), 3),
+                          remap[simplices].ravel(),
+                          chull.equations,
+                          sourceIndices)
+
+def sampleDirections(count):
+    # Evenly spread unit vectors on the sphere (fibonacci lattice)
+    index = np.arange(count) + 0.5
+    y = 1 - 2 * index / count
+    radius = np.sqrt(1 - y * y)
+    theta = np.pi * (1 + 5 ** 0.5) * index
+    return np.column_stack([np.cos(theta) * radius, y, np.sin(theta) * radius])
+
+def extremePoints(points, directions, chunk=65536):
+    # Indices of the farthest point along each direction and its opposite
+    directions = np.concatenate([directions, -directions])
+    best = np.full(len(directions), -np.inf)
+    bestIndex = np.zeros(len(directions), dtype=np.int64)
+    for start in range(0, len(points), chunk):
+        dots = directions @ points[start:start + chunk].T
+        index = dots.argmax(axis=1)
+        value = np.take_along_axis(dots, index[:, None], axis=1)[:, 0]
+        better = value > best
+        best[better] = value[better]
+        bestIndex[better] = index[better] + start
+    return np.unique(bestIndex)
+
+def outsideDistances(points, equations, chunk=2 ** 24):
+    # Largest signed plane distance per point (> 0 means outside the hull) and
+    # the face it belongs to, in blocks of at most chunk plane tests
+    rows = max(1, chunk // max(len(equations), 1))
+    distances = np.empty(len(points))
+    faces = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), rows):
+        block = points[start:start + rows] @ equations[:, :3].T + equations[:, 3]
+        faces[start:start + rows] = block.argmax(axis=1)
+        distances[start:start + rows] = np.take_along_axis(
+            block, faces[start:start + rows, None], axis=1)[:, 0]
+    return distances, faces
+
+def outsidePoints(points, equations, tolerance=1e-9):
+    return np.flatnonzero(outsideDistances(points, equations)[0] > -tolerance)
+
+def refineHull(points, seeds, candidates, maxFaces=None, maxError=None):
+    # Quickhull style refinement: each round adds the farthest outside point of
+    # every face until the hull is within maxError of all input points or has
+    # reached maxFaces triangles
+    chull = getSpatial().ConvexHull(points[seeds], incremental=True)
+    sourceIds = list(seeds)
+    error = 0.0
+    # the hull only grows, so a point once within maxError stays within it
+    settled = 0.0
+    refine = maxFaces is not None or maxError is not None
+    while len(candidates):
+        distances, faces = outsideDistances(points[candidates], chull.equations)
+        outside = distances > 0
+        if maxError is not None and maxFaces is None:
+            close = outside & (distances <= maxError)
+            if close.any():
+                settled = max(settled, float(distances[close].max()))
+            outside &= distances > maxError
+        candidates = candidates[outside]
+        distances = distances[outside]
+        faces = faces[outside]
+        error = max(settled, float(distances.max()) if len(distances) else 0.0)
+        if not refine or not len(candidates):
+            break
+        if maxError is not None and error <= maxError:
+            break
+        if maxFaces is not None and len(chull.simplices) >= maxFaces:
+            break
+        order = np.argsort(distances)[::-1]
+        _, first = np.unique(faces[order], return_index=True)
+        picked = order[np.sort(first)]
+        if maxFaces is not None:
+            # every added point costs about two triangles
+            picked = picked[:max(1, (maxFaces - len(chull.simplices)) // 2)]
+        chull.add_points(points[candidates[picked]])
+        sourceIds.extend(candidates[picked])
+        candidates = np.delete(candidates, picked)
+    if not len(candidates):
+        error = settled
+    chull.close()
+    return chull, np.asarray(sourceIds), error
+
+def mergeCoplanarFaces(hull, tolerance=1e-6):
+    # Triangles sharing a plane become one n-gon, fewer faces for Maya and for ray tests
+    counts = hull.faceCounts
+    if len(counts) == 0 or np.any(counts != 3):
+        return hull
+    scale = max(np.linalg.norm(hull.points.max(axis=0) - hull.points.min(axis=0)), 1e-12)
+    keys = np.column_stack([hull.equations[:, :3], hull.equations[:, 3] / scale])
+    _, groups, sizes = np.unique(np.round(keys / tolerance).astype(np.int64), axis=0,
+                                 return_inverse=True, return_counts=True)
+    if len(sizes) == len(counts):
+        return hull
+    order = np.argsort(groups.ravel(), kind="stable")
+    triangles = hull.faceConnects.reshape(-1, 3)
+
+    faceCounts = []
+    faceConnects = []
+    equations = []
+    for members in np.split(order, np.cumsum(sizes)[:-1]):
+        loop = None
+        if len(members) > 1:
+            loop = boundaryLoop(triangles[members])
+        if loop is None:
+            for member in members:
+                faceCounts.append(3)
+                faceConnects.extend(triangles[member])
+                equations.append(hull.equations[member])
+        else:
+            faceCounts.append(len(loop))
+            faceConnects.extend(loop)
+            equations.append(hull.equations[members[0]])
+
+    merged = ConvexHullData(hull.points, faceCounts, faceConnects, equations, hull.sourceIndices)
+    return merged
+
+def boundaryLoop(triangles):
+    # Outline of an edge connected patch of consistently wound triangles
+    edges = np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]])
+    inner = set(map(tuple, edges.tolist()))
+    following = {}
+    for a, b in edges.tolist():
+        if (b, a) not in inner:
+            if a in following:
+                return None
+            following[a] = b
+    if not following:
+        return None
+    start = next(iter(following))
+    loop = [start]
+    while following[loop[-1]] != start:
+        loop.append(following[loop[-1]])
+        if len(loop) > len(following):
+            return None
+    if len(loop) != len(following):
+        return None
+    return loop
+
+def orientSimplices(points, simplices, equations):
+    a = points[simplices[:, 0]]
+    b = points[simplices[:, 1]]
+    c = points[simplices[:, 2]]
+    normals = np.cross(b - a, c - a)
+    flip = np.einsum('ij,ij->i', normals, equations[:, :3]) < 0
+    oriented = simplices.copy()
+    oriented[flip, 1] = simplices[flip, 2]
+    oriented[flip, 2] = simplices[flip, 1]
+    return oriented
+
+
+# Ray casting against convex volumes
+def intersectConvex(origins, directions, equations, maxParam=99999.0, tolerance=1e-12):
+    # Works in any dimension: equations are (F, D + 1) half-spaces.
+    # Returns the first hit along each ray (the exit point for rays starting
+    # inside) and a mask of rays that hit within [0, maxParam].
+    origins = np.asarray(origins, dtype=np.float64)
+    directions = np.asarray(directions, dtype=np.float64)
+    normals = equations[:, :-1]
+    distances = origins @ normals.T + equations[:, -1]
+    speeds = directions @ normals.T
+
+    entering = speeds < -tolerance
+    exiting = speeds > tolerance
+    with np.errstate(divide='ignore', invalid='ignore'):
+        params = -distances / speeds
+    tEnter = np.where(entering, params, -np.inf).max(axis=1)
+    tExit = np.where(exiting, params, np.inf).min(axis=1)
+
+    # rays parallel to a face never cross it, they miss if they start outside it
+    parallelOutside = (~(entering | exiting) & (distances > 0)).any(axis=1)
+    hitParam = np.where(tEnter >= 0, tEnter, tExit)
+    hit = (tEnter <= tExit) & ~parallelOutside & (hitParam >= 0) & (hitParam <= maxParam)
+
+    hitParam = np.where(hit, hitParam, 0.0)
+    return origins + directions * hitParam[:, None], hit
+
+def projectRing(points, equations, center, maxParam=99999.0):
+    # Shoot every ring CV horizontally toward the hull center axis in one pass
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    directions = np.empty_like(points)
+    directions[:, 0] = center[0] - points[:, 0]
+    directions[:, 1] = 0.0
+    directions[:, 2] = center[2] - points[:, 2]
+    return intersectConvex(points, directions, equations, maxParam)
+
+
+# Hull cross-sections
+def hullEdges(faceCounts, faceConnects):
+    # Unique undirected edges of a polygon mesh given as counts/connects
+    counts = np.repeat(faceCounts, faceCounts)
+    starts = np.repeat(np.cumsum(faceCounts) - faceCounts, faceCounts)
+    following = starts + (np.arange(len(faceConnects)) - starts + 1) % counts
+    edges = np.stack([faceConnects, faceConnects[following]], axis=1)
+    return np.unique(np.sort(edges, axis=1), axis=0)
+
+def slicePolygon(points, edges, height, tolerance=1e-9):
+    # Convex (K, 2) xz polygon of the hull at a height, counter clockwise.
+    # Returns None when the plane misses the hull or only touches it.
+    ya = points[edges[:, 0], 1] - height
+    yb = points[edges[:, 1], 1] - height
+    crossing = (ya * yb <= 0) & (ya != yb)
+    if np.count_nonzero(crossing) < 3:
+        return None
+    a = points[edges[crossing, 0]]
+    b = points[edges[crossing, 1]]
+    t = (ya[crossing] / (ya[crossing] - yb[crossing]))[:, None]
+    polygon = (a + (b - a) * t)[:, [0, 2]]
+
+    center = polygon.mean(axis=0)
+    angles = np.arctan2(polygon[:, 1] - center[1], polygon[:, 0] - center[0])
+    polygon = polygon[np.argsort(angles)]
+    edgesVec = np.roll(polygon, -1, axis=0) - polygon
+    keep = np.einsum('ij,ij->i', edgesVec, edgesVec) > tolerance * tolerance
+    polygon = polygon[keep]
+    if len(polygon) < 3:
+        return None
+    area = 0.5 * np.abs(np.sum(polygon[:, 0] * np.roll(polygon[:, 1], -1) -
+                               np.roll(polygon[:, 0], -1) * polygon[:, 1]))
+    if area <= tolerance:
+        return None
+    return polygon
+
+def polygonEquations(polygon):
+    # Outward (K, 3) half-planes n . p + d <= 0 of a convex polygon
+    edgesVec = np.roll(polygon, -1, axis=0) - polygon
+    normals = np.stack([edgesVec[:, 1], -edgesVec[:, 0]], axis=1)
+    normals /= np.linalg.norm(normals, axis=1)[:, None]
+    offsets = -np.einsum('ij,ij->i', normals, polygon)
+    inward = normals @ polygon.mean(axis=0) + offsets > 0
+    normals[inward] *= -1
+    offsets[inward] *= -1
+    return np.column_stack([normals, offsets])
+
+
+class HullSliceCache(object):
+    # Cross-section half-planes of a hull keyed by quantized height, LRU evicted.
+    # Rings are fitted by interpolating the hits on the two neighbouring slices.
+    def __init__(self, hull, step=None, maxBytes=8 * 1024 * 1024):
+        self.hull = hull
+        self.edges = hullEdges(hull.faceCounts, hull.faceConnects)
+        if step is None:
+            ys = hull.points[:, 1]
+            step = max(ys.max() - ys.min(), 1e-6) / 1024.0
+        self.step = float(step)
+        self.maxBytes = maxBytes
+        self.slices = OrderedDict()
+        self.bytes = 0
+        #counters
+        self.hits = 0
+        self.misses = 0
+
+    def get_slice(self, key):
+        if key in self.slices:
+            self.hits += 1
+            self.slices.move_to_end(key)
+            return self.slices[key]
+        self.misses += 1
+        polygon = slicePolygon(self.hull.points, self.edges, key * self.step)
+        equations = None if polygon is None else polygonEquations(polygon)
+        self.slices[key] = equations
+        self.bytes += 0 if equations is None else equations.nbytes
+        while self.bytes > self.maxBytes and len(self.slices) > 1:
+            _, evicted = self.slices.popitem(last=False)
+            self.bytes -= 0 if evicted is None else evicted.nbytes
+        return equations
+
+    def project_slice(self, key, origins, directions):
+        equations = self.get_slice(key)
+        if equations is None:
+            return origins, np.zeros(len(origins), dtype=bool)
+        return intersectConvex(origins, directions, equations)
+
+    def project(self, points, center=None):
+        # Same contract as projectRing, rays run horizontally toward the center axis
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if center is None:
+            center = self.hull.center
+        origins = points[:, [0, 2]]
+        directions = np.asarray([center[0], center[2]]) - origins
+        levels = points[:, 1] / self.step
+        keys = np.floor(levels).astype(np.int64)
+        fractions = (levels - keys)[:, None]
+
+        hitPoints = points.copy()
+        hits = np.zeros(len(points), dtype=bool)
+        # points sorted by slice key, each group is a contiguous run of indices
+        order = np.argsort(keys, kind="stable")
+        uniqueKeys, starts = np.unique(keys[order], return_index=True)
+        for key, members in zip(uniqueKeys, np.split(order, starts[1:])):
+            below, hitBelow = self.project_slice(int(key), origins[members], directions[members])
+            above, hitAbove = self.project_slice(int(key) + 1, origins[members], directions[members])
+            fraction = fractions[members]
+            blended = below + (above - below) * fraction
+            blended = np.where((hitBelow & ~hitAbove)[:, None], below, blended)
+            blended = np.where((hitAbove & ~hitBelow)[:, None], above, blended)
+            hitPoints[members, 0] = blended[:, 0]
+            hitPoints[members, 2] = blended[:, 1]
+            hits[members] = hitBelow | hitAbove
+        return hitPoints, hits
+
+    def clear(self, heightRange=None):
+        # Drops every slice, or only the ones between two heights
+        if heightRange is None:
+            self.slices.clear()
+            self.bytes = 0
+            return
+        low = np.floor(heightRange[0] / self.step) - 1
+        high = np.ceil(heightRange[1] / self.step) + 1
+        for key in [key for key in self.slices if low <= key <= high]:
+            equations = self.slices.pop(key)
+            self.bytes -= 0 if equations is None else equations.nbytes
+
+    def update(self, hull, heightRange=None):
+        # Swaps in a rebuilt hull, only slices within heightRange are dropped.
+        # The step is kept so the remaining keys stay valid.
+        self.hull = hull
+        self.edges = hullEdges(hull.faceCounts, hull.faceConnects)
+        self.clear(heightRange)
+
+    def stats(self):
+        return {"slices": len(self.slices), "bytes": self.bytes,
+                "hits": self.hits, "misses": self.misses}
+
+
+# Ring storage
+
+class RingBlock(object):
+    # Original and current cvs of all rings with the same subdivision count.
+    # Rows of removed rings are reused, capacity doubles when full.
+    def __init__(self, subdivisions, capacity=16):
+        self.subdivisions = subdivisions
+        self.original = np.zeros((capacity, subdivisions, 3), dtype=np.float64)
+        self.positions = np.zeros((capacity, subdivisions, 3), dtype=np.float64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = []
+        self.used = 0
+
+    def grow(self, capacity):
+        for name in ("original", "positions", "alive"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def allocate(self):
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.used == len(self.alive):
+                self.grow(len(self.alive) * 2)
+            row = self.used
+            self.used += 1
+        self.alive[row] = True
+        return row
+
+    def release(self, row):
+        self.alive[row] = False
+        self.free.append(row)
+
+    def rows(self):
+        return np.flatnonzero(self.alive[:self.used])
+
+    @property
+    def nbytes(self):
+        return self.original.nbytes + self.positions.nbytes + self.alive.nbytes
+
+
+class RingHandle(object):
+    # Row of a ring inside its block, the arrays are views so writes go to the store
+    __slots__ = ("block", "row")
+
+    def __init__(self, block, row):
+        self.block = block
+        self.row = row
+
+    @property
+    def subdivisions(self):
+        return self.block.subdivisions
+
+    @property
+    def original(self):
+        return self.block.original[self.row]
+
+    @property
+    def positions(self):
+        return self.block.positions[self.row]
+
+    @property
+    def alive(self):
+        return bool(self.block.alive[self.row])
+
+
+class RingStore(object):
+    # Cvs of every ring of a system in contiguous (rings, subdivisions, 3) arrays,
+    # one block per subdivision count, so all rings can be refitted in one pass.
+    def __init__(self):
+        self.blocks = {}
+
+    def block(self, subdivisions):
+        subdivisions = int(subdivisions)
+        if subdivisions not in self.blocks:
+            self.blocks[subdivisions] = RingBlock(subdivisions)
+        return self.blocks[subdivisions]
+
+    def add(self, originals, positions=None):
+        # originals (rings, subdivisions, 3), returns one handle per ring
+        originals = np.asarray(originals, dtype=np.float64)
+        positions = originals if positions is None else np.asarray(positions, dtype=np.float64)
+        block = self.block(originals.shape[1])
+        handles = []
+        for original, position in zip(originals, positions):
+            row = block.allocate()
+            block.original[row] = original
+            block.positions[row] = position
+            handles.append(RingHandle(block, row))
+        return handles
+
+    def remove(self, handle):
+        if handle.alive:
+            handle.block.release(handle.row)
+
+    def groups(self, handles=None):
+        # (block, rows) pairs, every live ring when handles is None
+        if handles is None:
+            return [(block, block.rows()) for block in self.blocks.values() if block.rows().size]
+        rows = OrderedDict()
+        for handle in handles:
+            rows.setdefault(id(handle.block), (handle.block, []))[1].append(handle.row)
+        return [(block, np.asarray(members)) for block, members in rows.values()]
+
+    def refit(self, project, handles=None, reset=True):
+        # Projects rings with one call per block. project has the projectRing contract.
+        # reset starts from the original x/z at the current height, cvs without a hit stay put.
+        for block, rows in self.groups(handles):
+            positions = block.positions[rows]
+            starts = positions.copy()
+            if reset:
+                starts[:, :, [0, 2]] = block.original[rows][:, :, [0, 2]]
+            hitPoints, hits = project(starts.reshape(-1, 3))
+            fitted = np.where(hits[:, None], hitPoints, positions.reshape(-1, 3))
+            block.positions[rows] = fitted.reshape(positions.shape)
+
+    def __len__(self):
+        return sum(len(block.rows()) for block in self.blocks.values())
+
+    @property
+    def nbytes(self):
+        return sum(block.nbytes for block in self.blocks.values())
+
+
+# Curves and sweep tubes
+def ringStart(hull, subdivisions, height):
+    # Circle of cvs at a height that is guaranteed to start outside the hull
+    center = hull.center
+    extents = hull.points.max(axis=0) - hull.points.min(axis=0)
+    radius = max(extents[0], extents[2]) / 2 * np.sqrt(2) * 1.1
+    angles = np.linspace(0, 2 * np.pi, subdivisions, endpoint=False)
+    return np.column_stack([center[0] + radius * np.cos(angles),
+                            np.full(subdivisions, height),
+                            center[2] + radius * np.sin(angles)])
+
+def evaluatePeriodicBSpline(cvs, samplesPerSpan=4):
+    # Points on the closed uniform cubic curve Maya builds from these cvs
+    cvs = np.asarray(cvs, dtype=np.float64)
+    count = len(cvs)
+    t = np.arange(samplesPerSpan) / float(samplesPerSpan)
+    basis = np.stack([(1 - t) ** 3,
+                      3 * t ** 3 - 6 * t ** 2 + 4,
+                      -3 * t ** 3 + 3 * t ** 2 + 3 * t + 1,
+                      t ** 3], axis=1) / 6.0
+    spans = (np.arange(count)[:, None] + np.arange(4)[None, :]) % count
+    return np.einsum('sk,ikd->isd', basis, cvs[spans]).reshape(-1, cvs.shape[1])
+
+def splineDeviation(polygon, equations, cvs, samplesPerSpan=16):
+    # Distance between the closed cubic curve of cvs on a convex slice and the slice,
+    # (per span deviation, per corner deviation, span closest to each corner).
+    # Both are convex around the slice center, so neighbours are looked up by angle.
+    curve = evaluatePeriodicBSpline(cvs, samplesPerSpan)
+    spanOf = np.arange(len(curve)) // samplesPerSpan
+    center = polygon.mean(axis=0)
+    deviation = np.zeros(len(cvs))
+
+    # the curve stays inside its cvs, so its distance to the slice is the nearest edge
+    cornerAngles = np.arctan2(polygon[:, 1] - center[1], polygon[:, 0] - center[0])
+    byAngle = np.argsort(cornerAngles)
+    curveAngles = np.arctan2(curve[:, 1] - center[1], curve[:, 0] - center[0])
+    following = np.searchsorted(cornerAngles[byAngle], curveAngles) % len(polygon)
+    edge = byAngle[following] - 1
+    signed = np.full(len(curve), -np.inf)
+    for offset in (-1, 0, 1):
+        plane = equations[(edge + offset) % len(polygon)]
+        signed = np.maximum(signed, np.einsum('ij,ij->i', curve, plane[:, :2]) + plane[:, 2])
+    np.maximum.at(deviation, spanOf, np.abs(signed))
+
+    # corners the curve cuts off, measured to the curve segments around the same angle
+    order = np.argsort(curveAngles)
+    following = np.searchsorted(curveAngles[order], cornerAngles) % len(curve)
+    cornerDeviation = np.full(len(polygon), np.inf)
+    nearest = np.zeros(len(polygon), dtype=np.int64)
+    for offset in (-1, 0):
+        a = order[(following + offset) % len(curve)]
+        ab = curve[(a + 1) % len(curve)] - curve[a]
+        t = np.clip(np.einsum('ij,ij->i', polygon - curve[a], ab) /
+                    np.maximum(np.einsum('ij,ij->i', ab, ab), 1e-300), 0, 1)
+        distance = np.linalg.norm(polygon - curve[a] - ab * t[:, None], axis=1)
+        closer = distance < cornerDeviation
+        cornerDeviation[closer] = distance[closer]
+        nearest[closer] = a[closer]
+    cornerSpan = spanOf[nearest]
+    np.maximum.at(deviation, cornerSpan, cornerDeviation)
+    return deviation, cornerDeviation, cornerSpan
+
+def fitAdaptiveRing(polygon, tolerance, minCount=4, maxCount=128, samplesPerSpan=16,
+                    sharpAngle=np.pi / 6, iterations=16):
+    # Fewest cvs whose closed cubic curve stays within tolerance of a convex xz slice,
+    # cvs sit on the slice boundary. Corners turning by more than sharpAngle that the curve
+    # cuts get three cvs, which makes them sharp. The other cvs are spread by the curvature
+    # each span showed on the previous pass, smooth spans deviate with the square of their
+    # length. Returns (cvs (N, 2), max deviation) of the best pass.
+    polygon = np.asarray(polygon, dtype=np.float64)
+    closed = np.vstack([polygon, polygon[:1]])
+    edgesVec = np.diff(closed, axis=0)
+    cumulative = np.concatenate([[0.0], np.cumsum(np.linalg.norm(edgesVec, axis=1))])
+    perimeter = cumulative[-1]
+    incoming = np.roll(edgesVec, 1, axis=0)
+    turning = np.abs(np.arctan2(incoming[:, 0] * edgesVec[:, 1] - incoming[:, 1] * edgesVec[:, 0],
+                                np.einsum('ij,ij->i', incoming, edgesVec)))
+    sharp = turning > sharpAngle
+    pinned = np.zeros(len(polygon), dtype=bool)
+    equations = polygonEquations(polygon)
+    minCount = max(int(minCount), 3)
+
+    def boundary(params):
+        params = np.mod(params, perimeter)
+        return np.column_stack([np.interp(params, cumulative, closed[:, 0]),
+                                np.interp(params, cumulative, closed[:, 1])])
+
+    free = np.linspace(0, perimeter, minCount, endpoint=False)
+    best = None
+    for iteration in range(iterations):
+        params = np.sort(np.concatenate([free, np.repeat(cumulative[:-1][pinned], 3)]))
+        cvs = boundary(params)
+        count = len(cvs)
+        deviation, cornerDeviation, cornerSpan = splineDeviation(polygon, equations, cvs, samplesPerSpan)
+        worst = float(deviation.max())
+        if best is None or worst < best[1]:
+            best = (cvs, worst)
+        if worst <= tolerance or count >= maxCount:
+            break
+
+        cut = sharp & ~pinned & (cornerDeviation > tolerance)
+        if np.any(cut):
+            # pin the corners first, they usually explain the neighbouring spans too
+            pinned |= cut
+            gap = np.abs(free[:, None] - cumulative[:-1][pinned][None])
+            free = free[np.minimum(gap, perimeter - gap).min(axis=1) > perimeter * 1e-9]
+            continue
+        # span i runs between cvs i + 1 and i + 2, unwrapped from the second cv onwards
+        knots = np.roll(params, -1)
+        knots[knots < knots[0]] += perimeter
+        knots = np.append(knots, knots[0] + perimeter)
+        # a little more margin on every pass so slices that keep missing settle
+        needed = np.sqrt(deviation / tolerance) * 1.1 ** (iteration + 1)
+        needed[np.diff(knots) <= 0] = 0
+        levels = np.concatenate([[0.0], np.cumsum(needed)])
+        if levels[-1] <= 0:
+            # only stacked corners so far
+            free = np.linspace(0, perimeter, minCount, endpoint=False)
+            continue
+        corners = 3 * np.count_nonzero(pinned)
+        total = int(np.clip(np.ceil(levels[-1]), max(minCount - corners, 1), maxCount - corners))
+        free = np.mod(np.interp((np.arange(total) + 0.5) * levels[-1] / total, levels, knots), perimeter)
+    return best
+
+def sweepTube(path, radius, sides=8):
+    # Closed tube around a closed polyline, quads as Maya counts/connects
+    path = np.asarray(path, dtype=np.float64)
+    count = len(path)
+    tangents = normalized(np.roll(path, -1, axis=0) - np.roll(path, 1, axis=0))
+    up = np.array([0.0, 1.0, 0.0])
+    side = np.cross(tangents, up)
+    degenerate = np.linalg.norm(side, axis=1) < 1e-9
+    side[degenerate] = np.cross(tangents[degenerate], [1.0, 0.0, 0.0])
+    side = normalized(side)
+    binormal = np.cross(side, tangents)
+
+    angles = np.linspace(0, 2 * np.pi, sides, endpoint=False)
+    offsets = (np.cos(angles)[None, :, None] * side[:, None, :] +
+               np.sin(angles)[None, :, None] * binormal[:, None, :]) * radius
+    points = (path[:, None, :] + offsets).reshape(-1, 3)
+
+    ring = np.arange(count)[:, None]
+    around = np.arange(sides)[None, :]
+    nextRing = (ring + 1) % count
+    nextAround = (around + 1) % sides
+    quads = np.stack([ring * sides + around,
+                      ring * sides + nextAround,
+                      nextRing * sides + nextAround,
+                      nextRing * sides + around], axis=2).reshape(-1)
+    return points, np.full(count * sides, 4, dtype=np.int32), quads.astype(np.int32)
+
+def mergeMeshes(meshes):
+    # Concatenates (points, counts, connects) meshes, offsetting the indices
+    meshes = list(meshes)
+    if not meshes:
+        return np.zeros((0, 3)), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+    offsets = np.cumsum([0] + [len(mesh[0]) for mesh in meshes[:-1]])
+    points = np.concatenate([np.asarray(mesh[0], dtype=np.float64) for mesh in meshes])
+    counts = np.concatenate([np.asarray(mesh[1], dtype=np.int32) for mesh in meshes])
+    connects = np.concatenate([np.asarray(mesh[2], dtype=np.int64) + offset
+                               for mesh, offset in zip(meshes, offsets)])
+    return points, counts, connects.astype(np.int32)
+
+def normalized(a, axis=-1, order=2):
+    l2 = np.atleast_1d(np.linalg.norm(a, order, axis))
+    l2[l2==0] = 1
+    return a / np.expand_dims(l2, axis)
+
+
+# OBJ files
+def readObjVertices(path):
+    vertices = []
+    with open(path) as objFile:
+        for line in objFile:
+            if line.startswith('v '):
+                vertices.append(line.split()[1:4])
+    return np.array(vertices, dtype=np.float64).reshape(-1, 3)
+
+def writeObj(path, meshes=(), curves=()):
+    # meshes: (name, points, counts, connects), curves: (name, points) closed polylines
+    lines = []
+    offset = 1
+    for name, points, counts, connects in meshes:
+        lines.append('o %s' % name)
+        lines.extend('v %.6f %.6f %.6f' % tuple(point) for point in points)
+        start = 0
+        for count in counts:
+            lines.append('f ' + ' '.join(str(index + offset) for index in connects[start:start + count]))
+            start += count
+        offset += len(points)
+    for name, points in curves:
+        lines.append('o %s' % name)
+        lines.extend('v %.6f %.6f %.6f' % tuple(point) for point in points)
+        indices = list(range(offset, offset + len(points))) + [offset]
+        lines.append('l ' + ' '.join(str(index) for index in indices))
+        offset += len(points)
+    with open(path, 'w') as objFile:
+        objFile.write('\n'.join(lines) + '\n')
+
+
+class HullDiskCache(object):
+    # Content addressed .npz store of computed hulls, oldest files are evicted
+    # once the directory grows past maxBytes
+    def __init__(self, directory=None, maxBytes=256 * 1024 * 1024):
+        if directory is None:
+            directory = os.environ.get("ROPETOOL_HULL_CACHE",
+                                       os.path.join(os.path.expanduser("~"), ".ropetool", "hullcache"))
+        self.directory = directory
+        self.maxBytes = maxBytes
+
+    def key(self, points, *options):
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((points.shape, options)).encode())
+        digest.update(points.tobytes())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                hull = ConvexHullData(data["points"], data["faceCounts"], data["faceConnects"],
+                                      data["equations"], data["sourceIndices"])
+                hull.quality = str(data["quality"])
+                hull.error = float(data["error"])
+                hull.buildTime = float(data["buildTime"])
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            # truncated or damaged entries (BadZipFile, EOFError, ...) are dropped and rebuilt
+            warnings.warn("Discarding damaged hull cache entry %s: %s" % (path, error))
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        hull.cached = True
+        # touch for least recently used eviction, a read only cache is still used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return hull
+
+    def store(self, key, hull):
+        # Best effort, the hull is already computed so a cache that cannot be written only warns
+        temporary = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # hulls of several meshes can be stored from different threads at once
+            temporary = self.path(key) + ".%d.%d.tmp" % (os.getpid(), threading.get_ident())
+            with open(temporary, "wb") as cacheFile:
+                np.savez_compressed(cacheFile, points=hull.points, faceCounts=hull.faceCounts,
+                                    faceConnects=hull.faceConnects, equations=hull.equations,
+                                    sourceIndices=np.asarray(hull.sourceIndices, dtype=np.int64),
+                                    quality=hull.quality, error=hull.error, buildTime=hull.buildTime)
+            os.replace(temporary, self.path(key))
+            temporary = None
+        except OSError as error:
+            warnings.warn("Could not write hull cache %s: %s" % (self.directory, error))
+            return False
+        finally:
+            if temporary is not None:
+                try:
+                    os.remove(temporary)
+                except OSError:
+                    pass
+        self.evict()
+        return True
+
+    def evict(self):
+        try:
+            fileNames = os.listdir(self.directory)
+        except OSError as error:
+            warnings.warn("Could not evict hull cache %s: %s" % (self.directory, error))
+            return
+        entries = []
+        for fileName in fileNames:
+            if fileName.endswith(".npz"):
+                path = os.path.join(self.directory, fileName)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for fileName in os.listdir(self.directory):
+                if fileName.endswith(".npz"):
+                    os.remove(os.path.join(self.directory, fileName))
+
+
+# Scene state
+
+def packState(meta, arrays):
+    # json metadata and named arrays as one compressed, base64 encoded npz string
+    stream = io.BytesIO()
+    np.savez_compressed(stream, meta=np.array(json.dumps(meta)), **arrays)
+    return base64.b64encode(stream.getvalue()).decode("ascii")
+
+def unpackState(text):
+    with np.load(io.BytesIO(base64.b64decode(text))) as data:
+        arrays = {key: data[key] for key in data.files if key != "meta"}
+        meta = json.loads(str(data["meta"]))
+    return meta, arrays
+
+def hullArrays(hull):
+    return {"hullPoints": hull.points, "hullFaceCounts": hull.faceCounts,
+            "hullFaceConnects": hull.faceConnects, "hullEquations": hull.equations,
+            "hullSourceIndices": np.asarray(hull.sourceIndices, dtype=np.int64)}
+
+def hullFromArrays(arrays, quality="exact", error=0.0):
+    hull = ConvexHullData(arrays["hullPoints"], arrays["hullFaceCounts"], arrays["hullFaceConnects"],
+                          arrays["hullEquations"], arrays["hullSourceIndices"])
+    hull.quality = quality
+    hull.error = error
+    hull.cached = True
+    return hull
@@ -1,12 +1,18 @@
-import scipy.spatial as spatial
 import numpy as np
 import maya.cmds as cmd
 import maya.mel as mel
 import maya.api.OpenMaya as om
+import RopeGeometry as geo
 import random
 from functools import partial
 import traceback
 import sys
+import time
+import json
+try:
+    from PySide6 import QtCore
+except ImportError:
+    from PySide2 import QtCore
 
 
 maya_useNewAPI = True
@@ -19,30 +25,201 @@ def normalized(a, axis=-1, order=2):
 def floatJitter(a, b):
     return a + (random.uniform(0, b) - b / 2)
 
+# Profiling
+class RopeProfiler(object):
+    # Opt-in count and timing of every maya command per tool operation.
+    #   RopeTool.profiler.enable()
+    #   ... use the tool ...
+    #   print(RopeTool.profiler.report())
+    def __init__(self):
+        self.enabled = False
+        self.operations = {}
+        self.stack = []
+        self.modules = {}
+
+    def enable(self):
+        if not self.enabled:
+            module = sys.modules[__name__]
+            self.modules = {"cmd": cmd, "mel": mel}
+            module.cmd = ProfiledModule(cmd, self, "cmds")
+            module.mel = ProfiledModule(mel, self, "mel")
+            self.enabled = True
+
+    def disable(self):
+        if self.enabled:
+            module = sys.modules[__name__]
+            module.cmd = self.modules["cmd"]
+            module.mel = self.modules["mel"]
+            self.enabled = False
+
+    def reset(self):
+        self.operations = {}
+
+    def get_operation(self, name):
+        if name not in self.operations:
+            self.operations[name] = {"calls": 0, "seconds": 0.0, "commands": {}}
+        return self.operations[name]
+
+    def record_command(self, name, seconds):
+        operation = self.get_operation(self.stack[-1] if self.stack else "(outside operations)")
+        command = operation["commands"].setdefault(name, [0, 0.0])
+        command[0] += 1
+        command[1] += seconds
+
+    def run(self, name, function, *args, **kwargs):
+        self.stack.append(name)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            operation = self.get_operation(name)
+            operation["calls"] += 1
+            operation["seconds"] += time.perf_counter() - start
+            self.stack.pop()
+
+    def report(self):
+        lines = []
+        for name, operation in sorted(self.operations.items()):
+            commandCalls = sum(count for count, _ in operation["commands"].values())
+            lines.append("%s: %d runs, %.4fs, %d maya commands" % (
+                name, operation["calls"], operation["seconds"], commandCalls))
+            for command, (count, seconds) in sorted(operation["commands"].items(),
+                                                     key=lambda item: -item[1][0]):
+                lines.append("    %-32s %8d calls %10.4fs" % (command, count, seconds))
+        return "\n".join(lines)
+
+    def dump(self, path):
+        with open(path, "w") as reportFile:
+            json.dump(self.operations, reportFile, indent=1)
+
+class ProfiledModule(object):
+    def __init__(self, module, profiler, prefix):
+        self._module = module
+        self._profiler = profiler
+        self._prefix = prefix
+
+    def __getattr__(self, attribute):
+        function = getattr(self._module, attribute)
+        if not callable(function):
+            return function
+        profiler = self._profiler
+        name = self._prefix + "." + attribute
+
+        def command(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.record_command(name, time.perf_counter() - start)
+        return command
+
+profiler = RopeProfiler()
+
+# Hulls are shared between sessions, set to None to always recompute
+hullCache = geo.HullDiskCache()
+
+def profiled(operation):
+    # Groups the maya commands of a method under an operation name while profiling
+    def decorator(function):
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            return profiler.run(operation, function, *args, **kwargs)
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        return wrapper
+    return decorator
+
 class RopeSystem(object):
-    def __init__(self, name,object,tool):
+    def __init__(self, name,object,tool, quality="exact", maxFaces=None, maxError=None,
+                 sliceCacheBytes=8 * 1024 * 1024, restore=None, sourcePoints=None):
+        # restore: (convexObject, hull) of a system saved in the scene or built in a batch,
+        # nothing is recomputed. sourcePoints are the vertices the hull was built from.
         self.tool = tool
         self.name = name
         self.ropes = []
+        self.ropeIndex = {}
+        # only goes up, names stay unique registry keys after ropes are deleted
+        self.ropeCounter = 0
+        self.stateNode = None
         #mesh & Convex
         self.selectedObject = []
-        self.convexObject = createConvexHull( getVertexPosition(object),object)
+        self.sourceObject = object
+        self.hullLimits = (maxFaces, maxError)
+        if restore is None:
+            self.sourcePoints = getVertexPosition(object)
+            self.convexObject, self.hull = createConvexHull(self.sourcePoints, object,
+                                                            quality, maxFaces, maxError)
+        else:
+            # read on demand by watch mode when not given
+            self.sourcePoints = sourcePoints
+            self.convexObject, self.hull = restore
+        self.convexFn = None
+        self.convexAccel = None
+        self.convexCallback = None
+        #watch mode
+        self.sourceCallback = None
+        self.hullPending = False
+        self.sliceCache = None
+        if sliceCacheBytes:
+            self.sliceCache = geo.HullSliceCache(self.hull, maxBytes=sliceCacheBytes)
         print("Created System: " + self.name)
         #rings
         self.rings = []
+        self.coils = {}
+        self.coilJobs = {}
+        self.ringStore = geo.RingStore()
 
         #Systems
         self.isActive = True
         self.ropeSystem = []
         self.ropeSystemGroup = "-"
 
-    def create_rope(self, subdivisions=14):
-        # Create Locator for each ring-
-        ropelocator = createLocator(self.convexObject)
+    @profiled("add rope")
+    def create_rope(self, subdivisions=14, tolerance=None):
+        # One ring at the center of the convex surface
+        center = cmd.objectCenter(self.convexObject, gl=True)
+        new_ring = self.build_rings([center[1]], subdivisions, tolerance=tolerance)[0]
+        self.createCable(new_ring,0)
+        self.updateSystem(new_ring)
+        self.add_ropes([new_ring])
+
+        return new_ring
 
-        # Get Sizes of object based on bounding_box of convex surface
-        convex_surface = cmd.listRelatives(self.convexObject, shapes=True)[0]
-        bounding_box = cmd.exactWorldBoundingBox(convex_surface)
+    @profiled("add ropes")
+    def create_ropes(self, count=10, start=0.1, end=0.9, spacing=None, relative=True, subdivisions=14,
+                     tolerance=None):
+        # Coil of rings between two heights (fractions of the hull height when relative),
+        # either count rings or one every spacing units
+        bounding_box = cmd.exactWorldBoundingBox(self.convexObject)
+        if relative:
+            low, high = bounding_box[1], bounding_box[4]
+            start = low + (high - low) * start
+            end = low + (high - low) * end
+        if spacing:
+            heights = np.arange(start, end + spacing * 0.5, spacing)
+        else:
+            heights = np.linspace(start, end, max(int(count), 1))
+
+        rings = self.build_rings(heights, subdivisions, bounding_box, tolerance)
+        coil = (self.name + "_Coil_" + str(len(self.coils))).replace(" ", "")
+        self.createCables(rings, coil)
+
+        # one update job for the whole coil, moving the group refits every ring
+        coil = cmd.group([ring.locator[0] for ring in rings], n=coil)
+        self.coils[coil] = list(rings)
+        for ring in rings:
+            ring.coil = coil
+        self.watch_coil(coil)
+        self.add_ropes(rings)
+
+        return rings
+
+    def build_rings(self, heights, subdivisions, bounding_box=None, tolerance=None):
+        # Locators and projected rings for several heights, shared data is queried once.
+        # With a tolerance every ring gets as many cvs as its slice needs instead of subdivisions.
+        if bounding_box is None:
+            bounding_box = cmd.exactWorldBoundingBox(self.convexObject)
         sizes = 0
         for i in range(2):
             csize = abs(bounding_box[i] - bounding_box[i + 3])
@@ -50,62 +227,246 @@ class RopeSystem(object):
 
         radius = sizes / 2
         radius *= np.sqrt(2)
-
-        name = self.name +"_Rope_"+ str(len(self.ropes))
-        name = name.replace(" ", "")
-
-        new_ring = RopeRing(name,
-                    cmd.circle(normal=(0, 1, 0), r=radius * 1.1, s=subdivisions, n=name), ropelocator,self)
-        temp_constraint = cmd.parentConstraint(ropelocator, new_ring.mesh, mo=0)
-
-        # save original point positions in array on the ring for update features
-        ring_nurbs = cmd.listRelatives(new_ring.mesh, shapes=True)[0]
-        for point in range(subdivisions):
-            new_ring.originalPositions.append(cmd.pointPosition(ring_nurbs + ".cv" + str([point]), w=True))
-
-        bounds = cmd.exactWorldBoundingBox(self.convexObject)
-        new_ring.bounds_size = bounds[3]+bounds[4]+bounds[5]/3
-        self.ray_ring(new_ring)
-        self.createCable(new_ring,0)
-        self.updateSystem(new_ring)
-        self.ropes.append(new_ring)
-
-        return new_ring
-
+        bounds_size = bounding_box[3]+bounding_box[4]+bounding_box[5]/3
+        center = cmd.objectCenter(self.convexObject, gl=True)
+        cmd.hide(self.convexObject)
+
+        fits = None
+        if tolerance:
+            fits = [self.fit_adaptive_ring(height, tolerance) for height in heights]
+
+        rings = []
+        for index, height in enumerate(heights):
+            name = self.name +"_Rope_"+ str(self.ropeCounter)
+            name = name.replace(" ", "")
+            self.ropeCounter += 1
+            count = subdivisions if fits is None or fits[index] is None else len(fits[index][0])
+            ropelocator = createLocator(self.convexObject, (center[0], height, center[2]))
+            new_ring = RopeRing(name,
+                        cmd.circle(normal=(0, 1, 0), r=radius * 1.1, s=count, n=name), ropelocator,self)
+            temp_constraint = cmd.parentConstraint(ropelocator, new_ring.mesh, mo=0)
+            new_ring.bounds_size = bounds_size
+            rings.append(new_ring)
+
+        curveFns = [getCurveFn(ring.mesh[0]) for ring in rings]
+        if fits is not None:
+            self.place_adaptive_rings(rings, curveFns, heights, fits, subdivisions, radius * 1.1, center)
+            return rings
+
+        # every ring is the same circle, read the first one and offset it to the other heights
+        template = getCurvePoints(curveFns[0], subdivisions)
+        originals = np.repeat(template[None], len(rings), axis=0)
+        originals[:, :, 1] += (np.asarray(heights, dtype=np.float64) - heights[0])[:, None]
+
+        # original point positions go to the ring store, all new rings are fitted at once
+        handles = self.ringStore.add(originals)
+        self.ringStore.refit(self.project_points, handles)
+        for ring, curveFn, handle, height in zip(rings, curveFns, handles, heights):
+            ring.handle = handle
+            ring.curveFn = curveFn
+            setCurvePoints(curveFn, handle.positions)
+            self.tool.scheduler.track(ring, height)
+
+        return rings
+
+    def fit_adaptive_ring(self, height, tolerance):
+        # (cvs (N, 3), deviation) of a ring within tolerance of the hull slice, None off the hull
+        edges = self.sliceCache.edges if self.sliceCache is not None else \
+            geo.hullEdges(self.hull.faceCounts, self.hull.faceConnects)
+        polygon = geo.slicePolygon(self.hull.points, edges, height)
+        if polygon is None:
+            return None
+        cvs, deviation = geo.fitAdaptiveRing(polygon, tolerance)
+        return np.column_stack([cvs[:, 0], np.full(len(cvs), height), cvs[:, 1]]), deviation
+
+    def place_adaptive_rings(self, rings, curveFns, heights, fits, subdivisions, radius, center):
+        # Adaptive cvs are already on the hull. Their originals sit on the start circle in the
+        # same directions, so a reset refit after a move finds the same spots on the slice.
+        # Slices run counter clockwise in xz, they are flipped when maya's circles do not.
+        start = getCurvePoints(curveFns[0], 3)
+        flip = np.sum(start[:, 0] * np.roll(start[:, 2], -1) - np.roll(start[:, 0], -1) * start[:, 2]) < 0
+        for ring, curveFn, height, fit in zip(rings, curveFns, heights, fits):
+            if fit is None:
+                # plane misses the hull, same as a fixed ring
+                ring.deviation = None
+                originals = geo.ringStart(self.hull, subdivisions, height)
+                cvs = originals
+            else:
+                cvs, ring.deviation = fit
+                directions = normalized((cvs - (center[0], height, center[2]))[:, [0, 2]])
+                originals = cvs.copy()
+                originals[:, 0] = center[0] + directions[:, 0] * radius
+                originals[:, 2] = center[2] + directions[:, 1] * radius
+                print("%s: %d cvs, max deviation %.6f" % (ring.name, len(cvs), ring.deviation))
+            if flip:
+                originals, cvs = originals[::-1], cvs[::-1]
+            handle = self.ringStore.add(originals[None], cvs[None])[0]
+            if fit is None:
+                self.ringStore.refit(self.project_points, [handle])
+            ring.handle = handle
+            ring.curveFn = curveFn
+            setCurvePoints(curveFn, handle.positions)
+            self.tool.scheduler.track(ring, height)
+
+    def combine_ropes(self, keepHistory=True):
+        # Merges every sweep output of the system with a single MFnMesh.create.
+        # keepHistory hides the live sweeps, otherwise they are deleted.
+        sweepNodes = [node for node in dict.fromkeys(ring.sweepMesh for ring in self.ropes)
+                      if node is not None]
+        outputs = []
+        for sweepNode in sweepNodes:
+            outputs.extend(cmd.listHistory(sweepNode, future=True, type='mesh') or [])
+        outputs = list(dict.fromkeys(outputs))
+        if not outputs:
+            print("No ropes to combine")
+            return None
+
+        points, counts, connects = geo.mergeMeshes(getMeshArrays(mesh) for mesh in outputs)
+        combined = createMesh((self.name + "_Combined").replace(" ", ""), points, counts, connects)
+
+        if keepHistory:
+            for mesh in outputs:
+                cmd.hide(cmd.listRelatives(mesh, parent=True) or mesh)
+        else:
+            transforms = [cmd.listRelatives(mesh, parent=True)[0] for mesh in outputs]
+            cmd.delete(sweepNodes + transforms)
+            for ring in self.ropes:
+                ring.sweepMesh = None
+        print("Combined %d ropes into %s (%d vertices)" % (len(self.ropes), combined, len(points)))
+        return combined
+
+    def add_ropes(self, rings):
+        self.ropes.extend(rings)
+        self.ropeIndex.update((ring.name, ring) for ring in rings)
+
+    def remove_rope(self, ring):
+        # Drops the ring from the list, the name index, its coil and the ring store
+        self.ropes.remove(ring)
+        self.ropeIndex.pop(ring.name, None)
+        if ring.coil is not None:
+            self.coils[ring.coil].remove(ring)
+            # the last ring of a coil takes its update job along
+            if not self.coils[ring.coil]:
+                self.unwatch_coil(ring.coil)
+        self.ringStore.remove(ring.handle)
+
+    def get_rope(self, name):
+        return self.ropeIndex.get(name)
+
+    def get_state(self):
+        # Ring parameters, cvs and the hull as json metadata plus flat arrays
+        rings = [ring for ring in self.ropes if ring.handle is not None]
+        meta = {"name": self.name,
+                "sourceObject": list(self.sourceObject),
+                "selectedObject": list(self.selectedObject),
+                "convexObject": self.convexObject,
+                "hullLimits": list(self.hullLimits),
+                "quality": self.hull.quality,
+                "error": self.hull.error,
+                "coils": sorted(self.coils),
+                "ropeCounter": self.ropeCounter,
+                "rings": [ring.get_state() for ring in rings]}
+        arrays = geo.hullArrays(self.hull)
+        arrays["originals"] = np.concatenate([ring.originalPositions for ring in rings]) if rings else np.zeros((0, 3))
+        arrays["positions"] = np.concatenate([ring.positions for ring in rings]) if rings else np.zeros((0, 3))
+        return meta, arrays
+
+    def save_state(self):
+        # One network node per system holding the packed state in a string attribute
+        if self.stateNode is None or not cmd.objExists(self.stateNode):
+            self.stateNode = cmd.createNode("network", name=(self.name + "_RopeState").replace(" ", ""))
+            cmd.addAttr(self.stateNode, longName="ropeState", dataType="string")
+        cmd.setAttr(self.stateNode + ".ropeState", geo.packState(*self.get_state()), type="string")
+
+    def delete_state(self):
+        if self.stateNode is not None and cmd.objExists(self.stateNode):
+            cmd.delete(self.stateNode)
+        self.stateNode = None
+
+    @classmethod
+    def from_state(cls, tool, meta, arrays, stateNode=None):
+        # Rebinds the saved nodes and update jobs, rings whose locator is gone are dropped
+        hull = geo.hullFromArrays(arrays, meta["quality"], meta["error"])
+        system = cls(meta["name"], meta["sourceObject"], tool, meta["quality"], *meta["hullLimits"],
+                     restore=(meta["convexObject"], hull))
+        system.selectedObject = meta["selectedObject"]
+        system.stateNode = stateNode
+
+        states = meta["rings"]
+        existing = set(cmd.ls([state["locator"][0] for state in states]) or []) if states else set()
+        offsets = np.cumsum([0] + [state["subdivisions"] for state in states])
+        rings = []
+        for state, start, end in zip(states, offsets[:-1], offsets[1:]):
+            if state["locator"][0] not in existing:
+                continue
+            ring = RopeRing.from_state(state, system)
+            ring.handle = system.ringStore.add(arrays["originals"][None, start:end],
+                                               arrays["positions"][None, start:end])[0]
+            if state["job"]:
+                system.updateSystem(ring)
+            tool.scheduler.track(ring, ring.positions[0, 1])
+            tool.indexRope = max(tool.indexRope, ring.index)
+            rings.append(ring)
+        system.add_ropes(rings)
+        # states saved before the counter existed continue after their highest rope number
+        suffixes = [int(state["name"].rsplit("_", 1)[-1]) for state in states
+                    if state["name"].rsplit("_", 1)[-1].isdigit()]
+        system.ropeCounter = meta.get("ropeCounter", max(suffixes) + 1 if suffixes else 0)
+
+        for coil in meta["coils"]:
+            system.coils[coil] = [ring for ring in rings if ring.coil == coil]
+            if system.coils[coil] and cmd.objExists(coil):
+                system.watch_coil(coil)
+        return system
+
+    def watch_coil(self, coil):
+        self.coilJobs[coil] = cmd.scriptJob(attributeChange=[coil + '.translate', partial(self.mark_coil, coil)],
+                                            protected=True)
+
+    def unwatch_coil(self, coil):
+        job = self.coilJobs.pop(coil, None)
+        if job is not None and cmd.scriptJob(exists=job):
+            cmd.scriptJob(kill=job, force=True)
+
+    def mark_coil(self, coil, *args):
+        self.tool.scheduler.mark_many(self, self.coils.get(coil, []))
+
+    @profiled("ray ring")
     def ray_ring(self,ring:object, reset=False):
-        ring_nurbs = cmd.listRelatives(ring.mesh, shapes=True)[0]
-        points = cmd.getAttr(ring_nurbs + '.spans')
+        # Cvs without a hit keep their current position like the old per cv move did
+        curveFn = ring.get_curve_fn()
+        ring.positions[:] = getCurvePoints(curveFn, ring.handle.subdivisions)
+        self.ringStore.refit(self.project_points, [ring.handle], reset)
+        setCurvePoints(curveFn, ring.positions)
+
+    @profiled("refit rings")
+    def refit_rings(self, rings=None, reset=True):
+        # Refits rings (all of them by default) with one projection per subdivision count,
+        # heights come from the store so only the curve writes touch maya
+        rings = self.ropes if rings is None else rings
+        self.ringStore.refit(self.project_points, [ring.handle for ring in rings], reset)
+        for ring in rings:
+            setCurvePoints(ring.get_curve_fn(), ring.positions)
+
+    def project_points(self, positions):
+        if self.sliceCache is not None:
+            return self.sliceCache.project(positions)
+        if self.hull is not None:
+            return geo.projectRing(positions, self.hull.equations, self.hull.center)
+        return self.ray_ring_mesh(positions)
+
+    def ray_ring_mesh(self, positions):
+        # Fallback for convex meshes without hull equations, one ray per cv
         convex_center_position = cmd.objectCenter(self.convexObject, gl=True)
-
-        selection = cmd.select(self.convexObject)
-        sel = om.MGlobal.getActiveSelectionList()
-        dagPath = sel.getDagPath(0)
-        fnMesh = om.MFnMesh(dagPath)
+        fnMesh = self.get_convex_fn()
 
         # Global Setup values
-        faceIDs = None
-        triIDs = None
-        IDsSorted = False
-        testbothdir = False
-        maxParam = 999999
         worldSpace = om.MSpace.kWorld
-        accelPar = fnMesh.autoUniformGridParams()
-        sortHits = True
-        hitPoints = om.MFloatPointArray()
-        hitRayParams = om.MFloatArray()
-        hitFaces = om.MIntArray()
-        hitTris = None
-        hitBarys1 = None
-        hitBarys2 = None
-        tolerance = 0.0001
-
-        for point in range(points):
-            # get Cv pos
-            pointPos = cmd.pointPosition(ring_nurbs + ".cv" + str([point]), w=True)
-
-            if (reset):
-                pointPos = ring.originalPositions[point][0], pointPos[1], ring.originalPositions[point][2]
+        accelPar = self.convexAccel
 
+        hitPoints = positions.copy()
+        hits = np.zeros(len(positions), dtype=bool)
+        for point, pointPos in enumerate(positions):
             pointSource = np.array([pointPos[0], pointPos[1], pointPos[2]])
             destinationPos = np.array([convex_center_position[0], pointPos[1], convex_center_position[2]])
             rayDir = destinationPos - pointSource
@@ -113,45 +474,416 @@ class RopeSystem(object):
             ray_dir = om.MFloatVector(rayDir[0], rayDir[1], rayDir[2])
 
             hit = fnMesh.closestIntersection(raySource, ray_dir,
-                                             worldSpace, 99999, False)
+                                             worldSpace, 99999, False, accelParams=accelPar)
 
             if hit:
                 hitPoint, hitRayParam, hitFace, hitTriangle, hitBary1, hitBary2 = hit
                 x, y, z, _ = hitPoint
-                cmd.move(x, y, z, ring_nurbs + ".cv" + str([point]), wd=True)
-
-        selection = cmd.select(ring.locator)
+                hitPoints[point] = x, y, z
+                hits[point] = True
+
+        return hitPoints, hits
+
+    def get_convex_fn(self):
+        # MFnMesh and intersection grid are kept until the convex mesh changes
+        if self.convexFn is None:
+            selection = om.MSelectionList()
+            selection.add(self.convexObject)
+            dagPath = selection.getDagPath(0)
+            dagPath.extendToShape()
+            self.convexFn = om.MFnMesh(dagPath)
+            self.convexAccel = self.convexFn.autoUniformGridParams()
+            if self.convexCallback is None:
+                self.convexCallback = om.MNodeMessage.addNodeDirtyCallback(
+                    dagPath.node(), self.invalidate_convex_fn)
+        return self.convexFn
+
+    def invalidate_convex_fn(self, *args):
+        if self.convexFn is not None:
+            self.convexFn.freeCachedIntersectionAccelerator()
+        self.convexFn = None
+        self.convexAccel = None
+
+    def set_watch(self, enabled=True):
+        # Watch mode refits the ropes while the source mesh is edited, deformed or sculpted
+        if enabled and self.sourceCallback is None:
+            if self.sourcePoints is None:
+                self.sourcePoints = getVertexPosition(self.sourceObject)
+            selection = om.MSelectionList()
+            selection.add(str(self.sourceObject[0]))
+            dagPath = selection.getDagPath(0)
+            dagPath.extendToShape()
+            self.sourceCallback = om.MNodeMessage.addNodeDirtyCallback(dagPath.node(), self.mark_source_dirty)
+        elif not enabled and self.sourceCallback is not None:
+            om.MMessage.removeCallback(self.sourceCallback)
+            self.sourceCallback = None
+
+    def mark_source_dirty(self, *args):
+        # every dirty event of a stroke ends up in one deferred refresh
+        if not self.hullPending:
+            self.hullPending = True
+            cmd.evalDeferred(self.refresh_hull, lowestPriority=True)
+
+    @profiled("hull refresh")
+    def refresh_hull(self):
+        # Updates the hull from the moved vertices, rewrites the convex mesh in place
+        # and refits only the rings around the faces that changed
+        self.hullPending = False
+        points = getVertexPosition(self.sourceObject)
+        moved = geo.movedVertices(self.sourcePoints, points)
+        self.sourcePoints = points
+        hull = geo.updateHull(self.hull, points, moved, *self.hullLimits)
+        if hull is None:
+            return []
+        heightRange = geo.changedHeightRange(self.hull, hull)
+        if heightRange is None:
+            self.hull = hull
+            return []
+
+        self.update_convex_mesh(hull)
+        self.hull = hull
+        if self.sliceCache is not None:
+            self.sliceCache.update(hull, heightRange)
+
+        # rings between two slices blend both, so pad the range by one slice
+        pad = self.sliceCache.step if self.sliceCache is not None else 0.0
+        low, high = heightRange[0] - pad, heightRange[1] + pad
+        rings = [ring for ring in self.ropes if low <= ring.positions[0, 1] <= high]
+        if rings:
+            self.refit_rings(rings)
+        return rings
+
+    def update_convex_mesh(self, hull):
+        # Same topology only moves the points, otherwise the shape is rebuilt in place
+        fnMesh = self.get_convex_fn()
+        vertices = [om.MPoint(tp[0], tp[1], tp[2]) for tp in hull.points.tolist()]
+        if (np.array_equal(hull.faceCounts, self.hull.faceCounts)
+                and np.array_equal(hull.faceConnects, self.hull.faceConnects)):
+            fnMesh.setPoints(vertices, om.MSpace.kWorld)
+        else:
+            fnMesh.createInPlace(vertices, hull.faceCounts.tolist(), hull.faceConnects.tolist())
+        fnMesh.updateSurface()
+        self.invalidate_convex_fn()
+
+    def clear_callbacks(self):
+        # Removes every callback and update job of the system, the rings stay in the scene
+        if self.convexCallback is not None:
+            om.MMessage.removeCallback(self.convexCallback)
+            self.convexCallback = None
+        self.set_watch(False)
+        self.invalidate_convex_fn()
+        for ring in self.ropes:
+            if ring.jobId is not None and cmd.scriptJob(exists=ring.jobId):
+                cmd.scriptJob(kill=ring.jobId, force=True)
+            # the scheduler holds the rings themselves, let them go with the system
+            self.tool.scheduler.forget(ring)
+        for coil in list(self.coilJobs):
+            self.unwatch_coil(coil)
 
     def deleteRope(self,rope2delete):
         delete(rope2delete)
 
     def createCable(self,ring, sweepType: int = 0):
-        cmd.select(ring.mesh[0])
+        self.createCables([ring], ring.name, sweepType)
+
+    def createCables(self, rings, name, sweepType: int = 0):
+        # One sweep node for all curves, with -oneNodePerCurve 0
+        cmd.select([ring.mesh[0] for ring in rings])
         sweepMesh = mel.eval('sweepMeshFromCurve -oneNodePerCurve ' + str(sweepType))
-        cmd.rename(sweepMesh,'SM_'+ring.name)
-        self.tool.indexRope += 1
-        ring.index = self.tool.indexRope
-        ring.parent_Rings()
+        sweepMesh = cmd.rename(sweepMesh,'SM_'+name)
+        for ring in rings:
+            self.tool.indexRope += 1
+            ring.index = self.tool.indexRope
+            ring.sweepMesh = sweepMesh
+            ring.parent_Rings()
 
     def updateSystem(self,ring:object):
         name = ring.name.replace("'", "")
         name = name.replace("[", "")
         name = name.replace("]", "")
-        cmd.scriptJob(attributeChange=[ring.locator[0]+'.translate', partial(self.ray_ring,ring,True)],
-                      protected=True)
+        ring.jobId = cmd.scriptJob(attributeChange=[ring.locator[0]+'.translate',
+                                                    partial(self.tool.scheduler.mark_dirty,self,ring)],
+                                   protected=True)
+
+# ring attribute, sweep attribute (None when it only lives on the ring), tool slider, slider command
+SWEEP_PARAMETERS = (
+    ("radius", "scaleProfileX", "radius_sl", "floatSliderGrp"),
+    ("collumn_subdivisions", "profilePolySides", "collumn_subdivisions_sl", "intSliderGrp"),
+    ("row_subdivisions", "interpolationSteps", "row_subdivisions_sl", "intSliderGrp"),
+    ("rotation", "rotateProfile", "rotation_sl", "floatSliderGrp"),
+    ("twist", "twist", "twist_sl", "floatSliderGrp"),
+    ("twistRear", None, "twistRear_sl", "floatSliderGrp"),
+    ("taperAm", "taper", "taperAm_sl", "floatSliderGrp"),
+)
+
+def setSweepAttributes(sweepMesh, values):
+    for attribute, value in values.items():
+        cmd.setAttr(sweepMesh + "." + attribute, value)
+
+def callLater(seconds, function):
+    # One shot on Qt's event loop, maya's idle queue is not kept busy while waiting
+    QtCore.QTimer.singleShot(max(int(np.ceil(seconds * 1000)), 0), function)
+
+class RopeParameterApplier(object):
+    # Writes slider edits to the sweeps of many rings. Only attributes that differ from
+    # the last written value are set, drags are applied at most once per interval and
+    # every edit (a whole drag included) is one undo chunk.
+    def __init__(self, lod=None, interval=1.0 / 30):
+        self.lod = lod
+        self.interval = interval
+        self.applied = {}
+        self.pending = {}
+        self.targets = []
+        self.scheduled = False
+        self.lastApply = 0.0
+        self.chunkOpen = False
+        self.dragged = set()
+        #counters
+        self.attributesSet = 0
+        self.attributesSkipped = 0
+
+    def edit(self, rings, attribute, value, drag=False):
+        # rings are only taken at the start of an edit, later ticks reuse them
+        if not self.chunkOpen:
+            cmd.undoInfo(openChunk=True, chunkName="RopeSettings")
+            self.chunkOpen = True
+            self.targets = list(rings)
+        self.pending[attribute] = value
+        if drag:
+            self.dragged.add(attribute)
+        if not drag:
+            self.flush(proxy=False)
+        elif not self.scheduled:
+            self.scheduled = True
+            callLater(self.lastApply + self.interval - time.perf_counter(), self.flush_drag)
+
+    def flush_drag(self):
+        self.scheduled = False
+        if not self.chunkOpen:
+            return
+        self.flush(proxy=True)
+
+    def flush(self, proxy=False):
+        pending = self.pending
+        self.pending = {}
+        try:
+            for ring in self.targets:
+                for attribute, value in pending.items():
+                    setattr(ring, attribute, value)
+            self.apply(self.targets, proxy)
+        finally:
+            if not proxy:
+                self.close()
+
+    def close(self):
+        self.targets = []
+        self.dragged = set()
+        if self.chunkOpen:
+            self.chunkOpen = False
+            cmd.undoInfo(closeChunk=True)
+
+    def apply(self, rings, proxy=False):
+        # Rings sharing a sweep (a coil) are written once, with the first ring's values
+        sweeps = {}
+        for ring in rings:
+            if ring.sweepMesh is not None:
+                sweeps.setdefault(ring.sweepMesh, ring)
+        for sweepMesh, ring in sweeps.items():
+            values = {"interpolationMode": 1}
+            for ringAttribute, sweepAttribute, _, _ in SWEEP_PARAMETERS:
+                if sweepAttribute is not None:
+                    values[sweepAttribute] = getattr(ring, ringAttribute)
+            if self.lod is not None:
+                if proxy:
+                    full = values["profilePolySides"], values["interpolationSteps"]
+                    values["profilePolySides"], values["interpolationSteps"] = self.lod.proxy(ring, *full)
+                    # a resolution slider being dragged shows its own value
+                    if "collumn_subdivisions" in self.dragged:
+                        values["profilePolySides"] = full[0]
+                    if "row_subdivisions" in self.dragged:
+                        values["interpolationSteps"] = full[1]
+                else:
+                    self.lod.forget(sweepMesh)
+            self.write(sweepMesh, values)
+        self.lastApply = time.perf_counter()
+
+    def write(self, sweepMesh, values):
+        applied = self.applied.setdefault(sweepMesh, {})
+        changed = {attribute: value for attribute, value in values.items() if applied.get(attribute) != value}
+        self.attributesSkipped += len(values) - len(changed)
+        self.attributesSet += len(changed)
+        setSweepAttributes(sweepMesh, changed)
+        applied.update(changed)
+
+    def forget(self, sweepMesh=None):
+        # Drops the written values, for sweeps that may have been edited outside the tool
+        if sweepMesh is None:
+            self.applied.clear()
+        else:
+            self.applied.pop(sweepMesh, None)
+
+    def stats(self):
+        return {"attributesSet": self.attributesSet, "attributesSkipped": self.attributesSkipped}
+
+    def reset_stats(self):
+        self.attributesSet = 0
+        self.attributesSkipped = 0
+
+class RopeInteractiveLod(object):
+    # Sweeps evaluate at their rings' proxy resolution while a locator or slider is dragged,
+    # the full resolution comes back in one update on release
+    def __init__(self, releaseDelay=0.25):
+        self.enabled = True
+        self.proxied = {}
+        self.releaseJob = None
+        self.write = setSweepAttributes
+        # moves without a drag (channel box, scripts, undo) never send DragRelease
+        self.releaseDelay = releaseDelay
+        self.lastEnter = 0.0
+        self.idleScheduled = False
+
+    def proxy(self, ring, polySides, interpolationSteps):
+        # Remembers the full resolution of the ring's sweep, returns the proxy levels
+        if not self.enabled or ring.sweepMesh is None:
+            return polySides, interpolationSteps
+        self.proxied[ring.sweepMesh] = (polySides, interpolationSteps)
+        return min(ring.proxyPolySides, polySides), min(ring.proxyInterpolationSteps, interpolationSteps)
+
+    def enter(self, rings):
+        # Drops the sweeps of dragged rings once, until the drag is released
+        if not self.enabled:
+            return
+        for ring in rings:
+            sweepMesh = ring.sweepMesh
+            if sweepMesh is None or sweepMesh in self.proxied:
+                continue
+            full = (cmd.getAttr(sweepMesh + ".profilePolySides"), cmd.getAttr(sweepMesh + ".interpolationSteps"))
+            polySides, interpolationSteps = self.proxy(ring, *full)
+            if (polySides, interpolationSteps) != full:
+                self.write(sweepMesh, {"profilePolySides": polySides, "interpolationSteps": interpolationSteps})
+        self.lastEnter = time.perf_counter()
+        if self.proxied and self.releaseJob is None:
+            self.releaseJob = cmd.scriptJob(event=["DragRelease", self.release], runOnce=True)
+        if self.proxied and not self.idleScheduled:
+            self.idleScheduled = True
+            callLater(self.releaseDelay, self.release_idle)
+
+    def forget(self, sweepMesh):
+        self.proxied.pop(sweepMesh, None)
+
+    def release_idle(self):
+        # Nothing entered for releaseDelay, so no drag is going on
+        self.idleScheduled = False
+        if not self.proxied:
+            return
+        remaining = self.lastEnter + self.releaseDelay - time.perf_counter()
+        if remaining > 0:
+            # still moving, wait out the rest of the delay
+            self.idleScheduled = True
+            callLater(remaining, self.release_idle)
+            return
+        if self.releaseJob is not None and cmd.scriptJob(exists=self.releaseJob):
+            cmd.scriptJob(kill=self.releaseJob, force=True)
+        self.release()
+
+    def release(self, *args):
+        self.releaseJob = None
+        proxied = self.proxied
+        self.proxied = {}
+        for sweepMesh, (polySides, interpolationSteps) in proxied.items():
+            if cmd.objExists(sweepMesh):
+                self.write(sweepMesh, {"profilePolySides": polySides, "interpolationSteps": interpolationSteps})
+
+class RopeUpdateScheduler(object):
+    # Coalesces locator change events into one deferred ray_ring per ring
+    def __init__(self, tolerance=0.0001, lod=None):
+        self.tolerance = tolerance
+        self.lod = lod
+        self.dirty = {}
+        self.heights = {}
+        self.pending = False
+        #counters
+        self.eventsReceived = 0
+        self.recomputes = 0
+        self.skipped = 0
+
+    def mark_dirty(self, system, ring, *args):
+        self.eventsReceived += 1
+        self.dirty[ring] = (system, ring)
+        if not self.pending:
+            self.pending = True
+            cmd.evalDeferred(self.flush, lowestPriority=True)
+
+    @profiled("drag update")
+    def flush(self):
+        self.pending = False
+        dirty = self.dirty
+        self.dirty = {}
+        for system, ring in dirty.values():
+            try:
+                height = ring.get_height()
+                last = self.heights.get(ring)
+                if last is not None and abs(height - last) <= self.tolerance:
+                    self.skipped += 1
+                    continue
+                if self.lod is not None:
+                    self.lod.enter([ring])
+                system.ray_ring(ring, True)
+                self.heights[ring] = height
+                self.recomputes += 1
+            except Exception:
+                traceback.print_exc()
+
+    def mark_many(self, system, rings, *args):
+        for ring in rings:
+            self.mark_dirty(system, ring)
+
+    def track(self, ring, height=None):
+        # Remember the height a ring was last fitted at
+        self.heights[ring] = ring.get_height() if height is None else float(height)
+
+    def forget(self, ring):
+        self.dirty.pop(ring, None)
+        self.heights.pop(ring, None)
+
+    def stats(self):
+        return {"eventsReceived": self.eventsReceived,
+                "recomputes": self.recomputes,
+                "skipped": self.skipped,
+                "pending": len(self.dirty)}
+
+    def reset_stats(self):
+        self.eventsReceived = 0
+        self.recomputes = 0
+        self.skipped = 0
+
+# RopeRing attributes saved with the scene, cvs are stored separately
+RING_STATE = ("name", "mesh", "locator", "sweepMesh", "coil", "index", "bounds_size", "radius",
+              "collumn_subdivisions", "row_subdivisions", "rotation", "twist", "twistRear", "taperAm",
+              "proxyPolySides", "proxyInterpolationSteps", "deviation")
 
 class RopeRing(object):
+    # Cvs live in the system's RingStore, the ring only keeps its handle
+    __slots__ = ("name", "mesh", "parent", "handle", "curveFn", "locator", "curveWarp", "sweep",
+                 "bounds_size", "sweepNode", "index", "jobId", "coil", "sweepMesh", "radius",
+                 "collumn_subdivisions", "row_subdivisions", "rotation", "twist", "twistRear", "taperAm",
+                 "proxyPolySides", "proxyInterpolationSteps", "deviation")
+
     def __init__(self,name,mesh,locator,parent):
         self.name = name
         self.mesh = mesh
         self.parent = parent
-        self.originalPositions = []
+        self.handle = None
+        self.curveFn = None
         self.locator = locator
         self.curveWarp = []
         self.sweep = False
         self.bounds_size = 1
         self.sweepNode =[]
         self.index = -1
+        self.jobId = None
+        self.coil = None
+        self.sweepMesh = 'SM_' + name
         #curveWrap/sweep variables
         self.radius = 0.05
         self.collumn_subdivisions = 8
@@ -160,28 +892,55 @@ class RopeRing(object):
         self.twist = 0
         self.twistRear = 0
         self.taperAm = 1
+        #resolution while dragging
+        self.proxyPolySides = 4
+        self.proxyInterpolationSteps = 2
+        #max distance to the hull slice of adaptive rings
+        self.deviation = None
 
     def add_sweep_node(self,sweep_name):
         self.sweepNode=sweep_name
 
-    def set_sweepattributes(self,tool):
-        sweepMeshName = 'SM_' + self.name
-        cmd.setAttr(sweepMeshName+".interpolationMode",1)
-        cmd.setAttr(sweepMeshName+".scaleProfileX",
-                    cmd.floatSliderGrp(tool.radius_sl, q=True, v=True))
-        cmd.setAttr(sweepMeshName+".profilePolySides",
-                    cmd.intSliderGrp(tool.collumn_subdivisions_sl, q=True, v=True))
-        cmd.setAttr(sweepMeshName+".interpolationSteps",
-                    cmd.intSliderGrp(tool.row_subdivisions_sl, q=True, v=True))
-        cmd.setAttr(sweepMeshName+".rotateProfile",
-                    cmd.floatSliderGrp(tool.rotation_sl, q=True, v=True))
-        cmd.setAttr(sweepMeshName+".twist",
-                    cmd.floatSliderGrp(tool.twist_sl, q=True, v=True))
-        cmd.setAttr(sweepMeshName+".taper",
-                    cmd.floatSliderGrp(tool.taperAm_sl, q=True, v=True))
+    def set_sweepattributes(self,tool, proxy=False):
+        # Takes every slider value and writes what changed to the sweep
+        if self.sweepMesh is None:
+            return
+        for ringAttribute, _, slider, command in SWEEP_PARAMETERS:
+            setattr(self, ringAttribute, getattr(cmd, command)(getattr(tool, slider), q=True, v=True))
+        tool.applier.apply([self], proxy)
+
+    def get_state(self):
+        state = {attribute: getattr(self, attribute) for attribute in RING_STATE}
+        state["subdivisions"] = self.handle.subdivisions
+        state["job"] = self.jobId is not None
+        return state
+
+    @classmethod
+    def from_state(cls, state, parent):
+        ring = cls(state["name"], state["mesh"], state["locator"], parent)
+        for attribute in RING_STATE:
+            # scenes saved before an attribute existed keep its default
+            setattr(ring, attribute, state.get(attribute, getattr(ring, attribute)))
+        return ring
+
+    @property
+    def originalPositions(self):
+        return self.handle.original
+
+    @property
+    def positions(self):
+        return self.handle.positions
+
+    def get_curve_fn(self):
+        if self.curveFn is None:
+            self.curveFn = getCurveFn(self.mesh[0])
+        return self.curveFn
+
+    def get_height(self):
+        return cmd.xform(self.locator[0], q=True, rp=True, ws=True)[1]
 
     def parent_Rings(self):
-        cmds.parent(self.mesh,self.locator)
+        cmd.parent(self.mesh,self.locator)
 
 class RopeTool(object):
     def __init__(self,width=400):
@@ -193,9 +952,16 @@ class RopeTool(object):
         self.systemsLs = []
         self.indexRope=0
         self.packed_systems = []
+        self.systemIndex = {}
         self.selectedSystem = None
         self.selectedRope = None
+        # system whose ropes the rope list shows
+        self.listedSystem = None
         self.active = False
+        self.lod = RopeInteractiveLod()
+        self.applier = RopeParameterApplier(self.lod)
+        self.lod.write = self.applier.write
+        self.scheduler = RopeUpdateScheduler(lod=self.lod)
 
         #Internal Variables
         self.radius_sl = 0.1
@@ -205,78 +971,261 @@ class RopeTool(object):
         self.twist_sl = 0
         self.twistRear_sl = 0
         self.taperAm_sl = 0
+        self.proxyPolySides_sl = 4
+        self.proxySteps_sl = 2
         self.debugtext = None
         self.createUI()
 
+        # systems are written into the scene on save and picked up again on open
+        self.sceneCallbacks = [
+            om.MSceneMessage.addCallback(om.MSceneMessage.kBeforeSave, self.save_state),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self.scene_opened),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew, self.scene_opened)]
+        self.restore_state()
+
     #Function
     def deleteSystem(self,system_2_delete):
         delete(system2Delete)
 
+    @profiled("create system")
     def createSystem(self, ignore):
-        selection = cmd.ls(sl=True,o=True)
-        if len(selection) == 1:
+        objects, skipped = getSelectedMeshes()
+        if skipped:
+            print("Skipped objects without a mesh: " + ", ".join(skipped))
+        if objects:
             print("objectFound")
-            self.selectedSystem = RopeSystem(str(selection[0]),selection,self)
-            setSelection(self.selectedSystem)
-            cmds.textScrollList(self.systemsList, e=True, append=self.selectedSystem.name)
-
-            self.packed_systems.append(self.selectedSystem)
-            self.update_systems()
+            systems = self.create_systems(objects)
+            if systems:
+                # the new system is empty, the rope list and sliders must not act on the old one
+                self.selectedSystem = systems[-1]
+                self.selectedRope = None
+                self.applier.forget()
+                self.update_rope_ui()
 
             # cmd.group(em=True, name= str(selectedSystem.name))
             # return new_system
         else:
             print("Object not found")
 
-    def get_selected_system(self):
-        currentName = cmds.textScrollList(self.systemsList, q=1, si=1)
+    @profiled("create systems")
+    def create_systems(self, objects, workers=None):
+        # One system per mesh object. Vertices are read here, one bulk read per mesh, the hulls
+        # are computed together on a thread pool and the convex meshes and systems are
+        # created in one pass at the end. A mesh that fails is reported and left out.
+        quality, maxFaces, maxError = self.get_hull_settings()
+        objects = [str(object) for object in objects]
+        failed = []
+        pointSets = []
+        for object in objects:
+            try:
+                pointSets.append(getVertexPosition([object]))
+            except Exception:
+                traceback.print_exc()
+                failed.append(object)
+                pointSets.append(None)
+        readable = [index for index, points in enumerate(pointSets) if points is not None]
+        start = time.perf_counter()
+        hulls = [None] * len(objects)
+        for index, hull in zip(readable, geo.cachedHulls([pointSets[index] for index in readable], quality,
+                                                         maxFaces, maxError, hullCache, workers,
+                                                         skipErrors=True)):
+            hulls[index] = hull
+        print("Computed %d hulls in %.3fs" % (len(readable), time.perf_counter() - start))
+
+        systems = []
+        for object, points, hull in zip(objects, pointSets, hulls):
+            if hull is None:
+                if points is not None:
+                    failed.append(object)
+                continue
+            try:
+                system = RopeSystem(self.unique_system_name(object), [object], self, quality, maxFaces,
+                                    maxError, restore=(createHullMesh([object], hull), hull),
+                                    sourcePoints=points)
+            except Exception:
+                traceback.print_exc()
+                failed.append(object)
+                continue
+            setSelection(system)
+            self.systemIndex[system.name] = system
+            systems.append(system)
+        self.register_systems(systems)
+        if failed:
+            print("Could not create systems for: " + ", ".join(failed))
+        return systems
+
+    def unique_system_name(self, name):
+        # Names are the registry keys, a second system on the same object gets a suffix
+        unique = name
+        index = 1
+        while unique in self.systemIndex:
+            unique = name + str(index)
+            index += 1
+        return unique
+
+    def register_system(self, system):
+        self.register_systems([system])
+
+    def register_systems(self, systems):
+        # one list append for all of them
+        self.packed_systems.extend(systems)
+        for system in systems:
+            self.systemIndex[system.name] = system
+        cmd.textScrollList(self.systemsList, e=True, append=[system.name for system in systems])
+
+    def get_system(self, name):
+        return self.systemIndex.get(name)
+
+    @profiled("save state")
+    def save_state(self, *args):
         for system in self.packed_systems:
-            if system.name == currentName[0]:
-                self.selectedSystem = system
-                print("changed selection to" + str(self.selectedSystem.name))
-                if len(system.ropes)>0:
-                    self.selectedRope = system.ropes[0]
-                    active=True
-                else:
-                    active=False
+            system.save_state()
+
+    @profiled("restore state")
+    def restore_state(self, *args):
+        # Registers every system saved in the scene that is not loaded yet
+        restored = []
+        for plug in cmd.ls("*.ropeState") or []:
+            stateNode = plug.split(".")[0]
+            try:
+                meta, arrays = geo.unpackState(cmd.getAttr(plug))
+                if meta["name"] in self.systemIndex:
+                    continue
+                system = RopeSystem.from_state(self, meta, arrays, stateNode)
+            except Exception:
+                traceback.print_exc()
+                print("Could not restore rope state from " + stateNode)
+                continue
+            self.register_system(system)
+            restored.append(system)
+        if restored:
+            print("Restored %d systems with %d ropes" % (len(restored), sum(len(system.ropes) for system in restored)))
+        return restored
+
+    def teardown(self, *args):
+        # Window closed or tool replaced: the systems are written into the scene and every
+        # callback and job of this instance is removed, the next tool restores the systems
+        if self.sceneCallbacks is None:
+            return
+        for callback in self.sceneCallbacks:
+            om.MMessage.removeCallback(callback)
+        self.sceneCallbacks = None
+        self.applier.close()
+        if self.lod.releaseJob is not None and cmd.scriptJob(exists=self.lod.releaseJob):
+            cmd.scriptJob(kill=self.lod.releaseJob, force=True)
+        self.lod.release()
+        self.save_state()
+        for system in self.packed_systems:
+            system.clear_callbacks()
 
+    def scene_opened(self, *args):
+        # the systems of the previous scene are gone, load the ones saved in this one
+        for system in self.packed_systems:
+            system.clear_callbacks()
+        self.packed_systems = []
+        self.systemIndex = {}
+        self.selectedSystem = None
+        self.selectedRope = None
+        self.scheduler.dirty.clear()
+        self.scheduler.heights.clear()
+        self.applier.forget()
+        self.update_systems()
+        self.restore_state()
+        self.update_rope_ui()
+
+    def get_hull_settings(self):
+        quality = geo.HULL_QUALITIES[cmd.optionMenu(self.hullQuality_om, q=True, select=True) - 1]
+        maxFaces = cmd.intFieldGrp(self.hullMaxFaces_if, q=True, value1=True) or None
+        maxError = cmd.floatFieldGrp(self.hullMaxError_ff, q=True, value1=True) or None
+        return quality, maxFaces, maxError
+
+    @profiled("select system")
+    def get_selected_system(self):
+        currentName = cmd.textScrollList(self.systemsList, q=1, si=1)
+        system = self.get_system(currentName[0]) if currentName else None
+        if system is None:
+            return
+        self.selectedSystem = system
+        print("changed selection to" + str(self.selectedSystem.name))
+        if len(system.ropes)>0:
+            self.selectedRope = system.ropes[0]
+            active=True
+        else:
+            active=False
+
+        self.applier.forget()
         self.update_rope_ui()
         self.get_slider_settings(active)
+        cmd.checkBox(self.watch_cb, e=True, value=self.selectedSystem.sourceCallback is not None)
 
+    @profiled("select rope")
     def set_selected_rope(self):
         # get current selected item in list
-        current_rope = cmds.textScrollList(self.ropeList, q=1, si=1)
-
-        #check if rope name is in ropes
-        for rope in self.selectedSystem.ropes:
-            if rope.name == current_rope[0]:
-                self.selectedRope = rope
-                print("Selected Ring: " + str(self.selectedRope.name))
-                self.get_slider_settings(True)
-                cmd.select(self.selectedRope.locator)
+        current_rope = cmd.textScrollList(self.ropeList, q=1, si=1)
+        rope = self.selectedSystem.get_rope(current_rope[0]) if current_rope else None
+        if rope is None:
+            return
+        self.selectedRope = rope
+        print("Selected Ring: " + str(self.selectedRope.name))
+        if rope.jobId is None:
+            # coil rings share one job, single handles get theirs on demand
+            self.selectedSystem.updateSystem(rope)
+        self.get_slider_settings(True)
+        cmd.select(self.selectedRope.locator)
 
+    @profiled("list refresh")
     def update_rope_ui(self):
-        #clear list
+        # clear and refill with one append of every rope name
         cmd.textScrollList(self.ropeList, e=True, removeAll=True)
-        if self.selectedSystem != None:
-            if len(self.selectedSystem.ropes)>0:
-                #get ropes of object selected in list
-                for rope in self.selectedSystem.ropes:
-                    cmds.textScrollList(self.ropeList, e=True, append= rope.name)
+        self.listedSystem = self.selectedSystem
+        if self.selectedSystem != None and len(self.selectedSystem.ropes)>0:
+            cmd.textScrollList(self.ropeList, e=True, append=[rope.name for rope in self.selectedSystem.ropes])
 
+    @profiled("list refresh")
     def update_systems(self):
-        # Clear all items in list.
-        cmds.textScrollList(self.systemsList, e=True, removeAll=True)
+        cmd.textScrollList(self.systemsList, e=True, removeAll=True)
+        if self.packed_systems:
+            cmd.textScrollList(self.systemsList, e=True, append=[system.name for system in self.packed_systems])
 
-        for system in self.packed_systems:
-            cmds.textScrollList(self.systemsList, e=True, append = system.name)
+    def append_ropes_ui(self, rings):
+        # new ropes of the shown system only need their own rows
+        if self.listedSystem is not self.selectedSystem:
+            self.update_rope_ui()
+            return
+        cmd.textScrollList(self.ropeList, e=True, append=[ring.name for ring in rings])
 
     def create_cable(self,ignore):
-        self.selectedRope = self.selectedSystem.create_rope()
+        self.selectedRope = self.selectedSystem.create_rope(tolerance=self.get_ring_tolerance())
         self.active=True
         self.get_slider_settings(True)
         self.set_slider_settings(None)
-        self.update_rope_ui()
+        self.append_ropes_ui([self.selectedRope])
+
+    def create_coil(self,ignore):
+        if self.selectedSystem is None:
+            print("No system selected")
+            return
+        count = cmd.intFieldGrp(self.coilCount_if, q=True, value1=True)
+        start = cmd.floatFieldGrp(self.coilRange_ff, q=True, value1=True)
+        end = cmd.floatFieldGrp(self.coilRange_ff, q=True, value2=True)
+        rings = self.selectedSystem.create_ropes(count, start, end, tolerance=self.get_ring_tolerance())
+        self.selectedRope = rings[-1]
+        self.active=True
+        self.get_slider_settings(True)
+        self.set_slider_settings(None)
+        self.append_ropes_ui(rings)
+
+    def get_ring_tolerance(self):
+        # 0 keeps the fixed 14 cv rings
+        tolerance = cmd.floatFieldGrp(self.ringTolerance_ff, q=True, value1=True)
+        return tolerance if tolerance > 0 else None
+
+    def set_watch(self, enabled, *args):
+        if self.selectedSystem is None:
+            print("No system selected")
+            cmd.checkBox(self.watch_cb, e=True, value=False)
+            return
+        self.selectedSystem.set_watch(enabled)
 
     def delete_system(self,ignore):
             # lookup system index and set to be deleted system
@@ -291,8 +1240,11 @@ class RopeTool(object):
                 self.selectedSystem = None
 
             # remove system and update scrollList
+            todelete.clear_callbacks()
+            todelete.delete_state()
             self.packed_systems.pop(index_at_list)
-            self.update_systems()
+            self.systemIndex.pop(todelete.name, None)
+            cmd.textScrollList(self.systemsList, e=True, removeItem=todelete.name)
             self.update_rope_ui()
 
     def delete_rope(self,ignore):
@@ -304,8 +1256,11 @@ class RopeTool(object):
             self.selectedRope = self.selectedSystem.ropes[index_at_list-1]
             print("Selected Ring: " + str(self.selectedRope.name))
             # remove ring and update scrollList
-            self.selectedSystem.ropes.pop(index_at_list)
-            self.update_rope_ui()
+            self.selectedSystem.remove_rope(todelete)
+            cmd.textScrollList(self.ropeList, e=True, removeItem=todelete.name)
+            self.scheduler.forget(todelete)
+            if todelete.jobId is not None and cmd.scriptJob(exists=todelete.jobId):
+                cmd.scriptJob(kill=todelete.jobId, force=True)
             cmd.delete(todelete.locator)
         else:
             print("Can't delete Last ring")
@@ -320,10 +1275,48 @@ class RopeTool(object):
     def eFunc(self,ignore):
         print("ddwweez")
 
-    def set_slider_settings(self,ignore):
+    @profiled("slider change")
+    def set_slider_settings(self, parameter=None, *args):
+        # cc of a slider, or every slider for a new rope when no parameter is given
+        if parameter is None:
+            if self.selectedRope != None:
+                self.selectedRope.set_sweepattributes(self)
+            return
+        self.edit_parameter(parameter, drag=False)
+
+    def drag_slider_settings(self, parameter, *args):
+        # dc of a slider, throttled and at proxy resolution until the cc
+        self.edit_parameter(parameter, drag=True)
+
+    def edit_parameter(self, parameter, drag=False):
+        for ringAttribute, _, slider, command in SWEEP_PARAMETERS:
+            if ringAttribute == parameter:
+                value = getattr(cmd, command)(getattr(self, slider), q=True, v=True)
+                break
+        rings = [] if self.applier.chunkOpen else self.get_target_rings()
+        self.applier.edit(rings, parameter, value, drag)
+
+    def get_target_rings(self):
+        # Selected ropes, every rope of the selected systems, or the active rope
+        if self.selectedSystem is not None:
+            names = cmd.textScrollList(self.ropeList, q=True, si=True) or []
+            rings = [ring for ring in map(self.selectedSystem.get_rope, names) if ring is not None]
+            if rings:
+                return rings
+        names = cmd.textScrollList(self.systemsList, q=True, si=True) or []
+        if len(names) > 1:
+            return [rope for system in map(self.get_system, names) if system is not None for rope in system.ropes]
+        return [self.selectedRope] if self.selectedRope is not None else []
+
+    def set_lod_settings(self,ignore):
         if self.selectedRope != None:
-            print("change var of " + self.selectedRope.name)
-            self.selectedRope.set_sweepattributes(self)
+            self.selectedRope.proxyPolySides = cmd.intSliderGrp(self.proxyPolySides_sl, q=True, v=True)
+            self.selectedRope.proxyInterpolationSteps = cmd.intSliderGrp(self.proxySteps_sl, q=True, v=True)
+
+    def set_interactive_lod(self, enabled, *args):
+        self.lod.enabled = enabled
+        if not enabled:
+            self.lod.release()
 
     def get_slider_settings(self,active,):
         #Get ring values to apply on refreshed or initialized sliders
@@ -336,6 +1329,8 @@ class RopeTool(object):
             cmd.floatSliderGrp(self.twist_sl, e=True, v=ring.twist,enable=active)
             cmd.floatSliderGrp(self.twistRear_sl, e=True, v=ring.twistRear,enable=active)
             cmd.floatSliderGrp(self.taperAm_sl, e=True, v=ring.taperAm ,enable=active)
+            cmd.intSliderGrp(self.proxyPolySides_sl, e=True, v=ring.proxyPolySides, enable=active)
+            cmd.intSliderGrp(self.proxySteps_sl, e=True, v=ring.proxyInterpolationSteps, enable=active)
 
     #internal func
     def xLayout(self,start=True):
@@ -356,46 +1351,76 @@ class RopeTool(object):
         tab01 = cmd.columnLayout(p=tab)
 
         cmd.text(label="Rope Radius", align="center",w=200)
-        self.radius_sl = cmd.floatSliderGrp(min=0.01, max=10, value=0, step=0.01,field=True,dc=self.set_slider_settings,enable=False)
+        self.radius_sl = cmd.floatSliderGrp(min=0.01, max=10, value=0, step=0.01,field=True,enable=False,
+                                            dc=partial(self.drag_slider_settings, "radius"),
+                                            cc=partial(self.set_slider_settings, "radius"))
 
         cmd.text(label="collumn_subdivisions", align="center", w=self.width)
-        self.collumn_subdivisions_sl = cmd.intSliderGrp(min=0, max=128, value=0, step=1,field=True,dc=self.set_slider_settings,enable=False)
+        self.collumn_subdivisions_sl = cmd.intSliderGrp(min=0, max=128, value=0, step=1,field=True,enable=False,
+                                                        dc=partial(self.drag_slider_settings, "collumn_subdivisions"),
+                                                        cc=partial(self.set_slider_settings, "collumn_subdivisions"))
 
         cmd.text(label="row_subdivisions", align="center", w=self.width)
-        self.row_subdivisions_sl = cmd.intSliderGrp(min=0, max=200, value=0, step=1,field=True,dc=self.set_slider_settings,enable=False)
+        self.row_subdivisions_sl = cmd.intSliderGrp(min=0, max=200, value=0, step=1,field=True,enable=False,
+                                                    dc=partial(self.drag_slider_settings, "row_subdivisions"),
+                                                    cc=partial(self.set_slider_settings, "row_subdivisions"))
 
         tab02 = cmd.columnLayout(p=tab)
 
         cmd.text(label="rotation", align="center", w=self.width)
-        self.rotation_sl = cmd.floatSliderGrp(min=-360, max=360, value=0, step=0.1,field=True,dc=self.set_slider_settings,enable=False)
+        self.rotation_sl = cmd.floatSliderGrp(min=-360, max=360, value=0, step=0.1,field=True,enable=False,
+                                              dc=partial(self.drag_slider_settings, "rotation"),
+                                              cc=partial(self.set_slider_settings, "rotation"))
 
         cmd.text(label="Twist", align="center", w=self.width)
-        self.twist_sl = cmd.floatSliderGrp(min=-2, max=2, value=0, step=0.1,field=True,dc=self.set_slider_settings,enable=False)
+        self.twist_sl = cmd.floatSliderGrp(min=-2, max=2, value=0, step=0.1,field=True,enable=False,
+                                           dc=partial(self.drag_slider_settings, "twist"),
+                                           cc=partial(self.set_slider_settings, "twist"))
 
         cmd.text(label="twistRear", align="center", w=self.width)
-        self.twistRear_sl = cmd.floatSliderGrp(min=0.01, max=1000, value=0, step=0.1,field=True,dc=self.set_slider_settings,enable=False)
+        self.twistRear_sl = cmd.floatSliderGrp(min=0.01, max=1000, value=0, step=0.1,field=True,enable=False,
+                                               dc=partial(self.drag_slider_settings, "twistRear"),
+                                               cc=partial(self.set_slider_settings, "twistRear"))
 
         cmd.text(label="Taper", align="center", w=self.width)
-        self.taperAm_sl = cmd.floatSliderGrp(min=0, max=5, value=1, step=0.1,field=True,dc=self.set_slider_settings,enable=False)
+        self.taperAm_sl = cmd.floatSliderGrp(min=0, max=5, value=1, step=0.1,field=True,enable=False,
+                                             dc=partial(self.drag_slider_settings, "taperAm"),
+                                             cc=partial(self.set_slider_settings, "taperAm"))
+
+        tab03 = cmd.columnLayout(p=tab)
+
+        cmd.checkBox(label="Interactive LOD", value=self.lod.enabled,
+                     onCommand=partial(self.set_interactive_lod, True),
+                     offCommand=partial(self.set_interactive_lod, False))
+
+        cmd.text(label="Proxy Sides", align="center", w=self.width)
+        self.proxyPolySides_sl = cmd.intSliderGrp(min=3, max=32, value=4, step=1,field=True,cc=self.set_lod_settings,enable=False)
+
+        cmd.text(label="Proxy Steps", align="center", w=self.width)
+        self.proxySteps_sl = cmd.intSliderGrp(min=1, max=50, value=2, step=1,field=True,cc=self.set_lod_settings,enable=False)
 
         cmd.tabLayout(tab, edit=True, tabLabel=((tab01, 'General'),
-                                                (tab02, 'Modifiers')
+                                                (tab02, 'Modifiers'),
+                                                (tab03, 'LOD')
                                                 ))
 
-    def combineRopes(self,ignore):
-       for rope in self.selectedSystem.ropes:
-           print(rope.name)
-           selection = cmd.select(rope.name)
-           vertexAmount = cmd.polyEvaluate(v=True)
-           cmd.detachCurve(rope)
-           pointPos = cmd.pointPosition(rope.name + ".cv" + str(vertexAmount - 1), w=True)
+    @profiled("combine ropes")
+    def combineRopes(self,ignore, keepHistory=True):
+        if self.selectedSystem is None:
+            print("No system selected")
+            return None
+        combined = self.selectedSystem.combine_ropes(keepHistory)
+        if combined is not None:
+            cmd.select(combined)
+        return combined
 
     def createUI(self):
         #close other window if open
         if cmd.window(self.window, exists=True,rtf=True):
             cmd.deleteUI(self.window, window=True)
 
-        self.window = cmd.window(self.window, title=self.title, widthHeight=self.size, rtf=True)
+        self.window = cmd.window(self.window, title=self.title, widthHeight=self.size, rtf=True,
+                                 closeCommand=self.teardown)
         self.c_layout = cmd.columnLayout(columnAttach=('both', 8), columnWidth=self.width,bgc=(0.2, 0.2, 0.2))
 
         cmd.text(label=self.title, p=self.c_layout)
@@ -404,6 +1429,17 @@ class RopeTool(object):
         self.debugtext = cmd.text(label="Select an Object to Start", al="center")
         cmd.separator(p=self.c_layout, style='in', h=50, w=self.width)
 
+        self.xLayout()
+        self.hullQuality_om = cmd.optionMenu(label="Hull Quality", w=self.width / 2)
+        for quality in geo.HULL_QUALITIES:
+            cmd.menuItem(label=quality.capitalize())
+        self.hullMaxFaces_if = cmd.intFieldGrp(label="Max Faces", value1=0, columnWidth2=(80, 80))
+        self.xLayout(False)
+        self.xLayout()
+        cmd.text(label="0 disables a limit", align="center", w=self.width / 2)
+        self.hullMaxError_ff = cmd.floatFieldGrp(label="Max Error", value1=0, precision=4, columnWidth2=(80, 80))
+        self.xLayout(False)
+
         self.xLayout()
         #Create System If object is selected is valid
 
@@ -417,6 +1453,21 @@ class RopeTool(object):
         cmd.button(label="Delete Rope", w=self.width / 2, h=50, command= self.eFunc)
         self.xLayout(False)
 
+        self.xLayout()
+        self.coilCount_if = cmd.intFieldGrp(label="Rings", value1=10, columnWidth2=(80, 80))
+        self.coilRange_ff = cmd.floatFieldGrp(label="Heights", numberOfFields=2, value1=0.1, value2=0.9,
+                                              precision=2, columnWidth3=(80, 50, 50))
+        self.xLayout(False)
+        cmd.button(label="Add Coil", p=self.c_layout, w=self.width, h=30, command=self.create_coil)
+        self.xLayout()
+        cmd.text(label="0 uses 14 cvs per ring", align="center", w=self.width / 2)
+        self.ringTolerance_ff = cmd.floatFieldGrp(label="Ring Tolerance", value1=0, precision=4,
+                                                  columnWidth2=(80, 80))
+        self.xLayout(False)
+        self.watch_cb = cmd.checkBox(label="Watch Source Mesh", p=self.c_layout, value=False,
+                                     onCommand=partial(self.set_watch, True),
+                                     offCommand=partial(self.set_watch, False))
+
         self.xLayout()
         cmd.text(label="Systems", align="center", w=self.width / 2)
         cmd.text(label="Ropes", align="center", w=self.width / 2)
@@ -424,10 +1475,10 @@ class RopeTool(object):
 
         self.xLayout()
         # scrolllists for Systems and containing rings
-        self.systemsList = cmds.textScrollList(numberOfRows=8, allowMultiSelection=True,
+        self.systemsList = cmd.textScrollList(numberOfRows=8, allowMultiSelection=True,
                                                append=[],
                                                selectItem='SystemTestOne', showIndexedItem=4,dcc=self.get_selected_system)
-        self.ropeList = cmds.textScrollList(numberOfRows=8, allowMultiSelection=True,
+        self.ropeList = cmd.textScrollList(numberOfRows=8, allowMultiSelection=True,
                                             append=[],
                                             selectItem='Rope-One', showIndexedItem=4,dcc=self.set_selected_rope)
         self.xLayout(False)
@@ -455,7 +1506,48 @@ def setSelection(self):
     self.selectedObject = cmd.ls(sl=True,long=True)
     print("Selection Set to: "+ self.name )
 
-def getVertexPosition(object):
+def getSelectedMeshes():
+    # Selected transforms with a mesh below them (groups give their meshes) and the
+    # selected objects without one
+    meshes = []
+    skipped = []
+    for object in cmd.ls(sl=True, o=True) or []:
+        shapes = cmd.ls(object, dag=True, type="mesh", noIntermediate=True) or []
+        parents = [cmd.listRelatives(shape, parent=True)[0] for shape in shapes]
+        if parents:
+            meshes.extend(parents)
+        else:
+            skipped.append(object)
+    return list(dict.fromkeys(meshes)), skipped
+
+def getVertexPosition(object, bulk=True):
+    # World space points as a contiguous (N, 3) float64 array
+    if bulk:
+        try:
+            return getVertexPositionBulk(object)
+        except (RuntimeError, ValueError):
+            traceback.print_exc()
+            print("Bulk vertex fetch failed, falling back to per vertex query")
+    return np.array(getVertexPositionLegacy(object), dtype=np.float64)
+
+def getVertexPositionBulk(object):
+    # One xform over every vertex instead of one per vertex. It returns a flat list of floats,
+    # MFnMesh.getPoints would build an MPoint wrapper per vertex while converting.
+    points = cmd.xform(str(object[0]) + ".vtx[*]", q=True, t=True, ws=True)
+    return np.array(points, dtype=np.float64).reshape(-1, 3)
+
+def getMeshArrays(mesh):
+    # World space points and face counts/connects of a mesh in three bulk calls
+    selection = om.MSelectionList()
+    selection.add(mesh)
+    dagPath = selection.getDagPath(0)
+    dagPath.extendToShape()
+    fnMesh = om.MFnMesh(dagPath)
+    points = getVertexPositionBulk([mesh])
+    counts, connects = fnMesh.getVertices()
+    return points, np.array(counts, dtype=np.int32), np.array(connects, dtype=np.int32)
+
+def getVertexPositionLegacy(object):
     vertexPositions = []
     vertexAmount = cmd.polyEvaluate(object, v=True)
     for i in range(vertexAmount):
@@ -463,20 +1555,43 @@ def getVertexPosition(object):
         vertexPositions.append(ptPos)
     return vertexPositions
 
-def createConvexHull(vertexPositions,object):
-    chull = spatial.ConvexHull(vertexPositions)
-    indices = chull.simplices
-    vertices = [om.MPoint(tp[0], tp[1], tp[2]) for tp in chull.points]
-    poligon_counts = [len(x) for x in indices]
-    poly_connect = [x for y in chull.simplices for x in y]
+def compareVertexFetch(subdivisions=(32, 100, 320, 1000), legacyLimit=250000):
+    # Times bulk vs per vertex fetch on temporary planes of increasing density
+    results = []
+    for subdivision in subdivisions:
+        plane = cmd.polyPlane(sx=subdivision, sy=subdivision, ch=False)
+        vertexAmount = cmd.polyEvaluate(plane, v=True)
+
+        start = time.perf_counter()
+        getVertexPositionBulk(plane)
+        bulkTime = time.perf_counter() - start
+
+        legacyTime = None
+        if vertexAmount <= legacyLimit:
+            start = time.perf_counter()
+            getVertexPositionLegacy(plane)
+            legacyTime = time.perf_counter() - start
+
+        cmd.delete(plane)
+        results.append((vertexAmount, bulkTime, legacyTime))
+        if legacyTime is None:
+            print("%9d vertices  bulk %8.4fs  legacy skipped" % (vertexAmount, bulkTime))
+        else:
+            print("%9d vertices  bulk %8.4fs  legacy %8.4fs  x%.1f" % (
+                vertexAmount, bulkTime, legacyTime, legacyTime / max(bulkTime, 1e-9)))
+    return results
 
-    transform_name = cmd.createNode('transform',name=object[0]+"_Convex")
-    transform_mobj = om.MGlobal.getSelectionListByName(transform_name).getDependNode(0)
-    mesh_fn = om.MFnMesh()
-    mesh_fn.create(vertices, poligon_counts, poly_connect, parent=transform_mobj)
+def createConvexHull(vertexPositions,object, quality="exact", maxFaces=None, maxError=None):
+    hull = geo.cachedHull(vertexPositions, quality, maxFaces, maxError, hullCache)
+    return createHullMesh(object, hull), hull
+
+def createHullMesh(object, hull):
+    # Convex mesh in the scene for a hull computed beforehand
+    print("Convex hull (%s%s): %d faces in %.3fs, max error %.5f" % (
+        hull.quality, ", cached" if hull.cached else "", hull.faceCount, hull.buildTime, hull.error))
+    transform_name = createMesh(object[0]+"_Convex", hull.points, hull.faceCounts, hull.faceConnects)
 
     # Set Center of object
-    cmd.sets(transform_name, e=True, forceElement='initialShadingGroup')
     cmd.xform(transform_name, cp=1)
 
     # Clean up mesh and set normal
@@ -485,11 +1600,74 @@ def createConvexHull(vertexPositions,object):
     cmd.polyNormal( nm=2 )
     cmd.polyNormal( nm=3)
     cmd.polySoftEdge(a=180)
+    # no history, watch mode rewrites the shape in place
+    cmd.delete(transform_name, ch=True)
+    return transform_name
+
+def createMesh(name, points, counts, connects):
+    # Builds a mesh from arrays with a single MFnMesh.create call
+    vertices = [om.MPoint(tp[0], tp[1], tp[2]) for tp in np.asarray(points).tolist()]
+    transform_name = cmd.createNode('transform',name=name)
+    transform_mobj = om.MGlobal.getSelectionListByName(transform_name).getDependNode(0)
+    mesh_fn = om.MFnMesh()
+    mesh_fn.create(vertices, np.asarray(counts).tolist(), np.asarray(connects).tolist(), parent=transform_mobj)
+    cmd.sets(transform_name, e=True, forceElement='initialShadingGroup')
     return transform_name
 
-def createLocator(convexTransform):
-    centerPosition = cmd.objectCenter(convexTransform, gl=True)
-    cmd.hide(convexTransform)
+def createRingCurves(names, rings):
+    # Closed cubic curves for many rings through MFnNurbsCurve, no maya command per ring
+    curveFn = om.MFnNurbsCurve()
+    curves = []
+    for name, points in zip(names, rings):
+        points = np.asarray(points).tolist()
+        cvs = [om.MPoint(x, y, z) for x, y, z in points + points[:3]]
+        transform = curveFn.create(cvs, list(range(-2, len(points) + 3)), 3, om.MFnNurbsCurve.kPeriodic,
+                                   False, False, om.MObject.kNullObj)
+        curves.append(om.MFnDependencyNode(transform).setName(name))
+    return curves
+
+def importBatchResults(results, groupName="RopeBatch"):
+    # Brings RopeBatch output (results or a result directory) into the scene. Maya commands
+    # run per object, the tubes are one MFnMesh.create and the rings one createRingCurves pass.
+    if isinstance(results, str):
+        import RopeBatch
+        results = RopeBatch.loadResults(results)
+    group = cmd.group(em=True, n=groupName)
+    for result in results:
+        name = str(result["name"])
+        nodes = [createMesh("SM_" + name, result["tubePoints"], result["tubeCounts"], result["tubeConnects"])]
+        nodes += createRingCurves([name + "_Rope_" + str(index) for index in range(len(result["rings"]))],
+                                  result["rings"])
+        objectGroup = cmd.group(nodes, n=name + "_Ropes")
+        cmd.parent(objectGroup, group)
+    return group
+
+def getCurveFn(curve):
+    selection = om.MSelectionList()
+    selection.add(curve)
+    dagPath = selection.getDagPath(0)
+    dagPath.extendToShape()
+    return om.MFnNurbsCurve(dagPath)
+
+def getCurvePoints(curveFn, count):
+    # First count world space cvs, periodic overlap cvs are skipped
+    cvs = curveFn.cvPositions(om.MSpace.kWorld)
+    return np.array(cvs, dtype=np.float64)[:count, :3]
+
+def setCurvePoints(curveFn, positions):
+    # Writes all cvs in one call, periodic overlap cvs wrap to the start
+    cvs = curveFn.cvPositions(om.MSpace.kWorld)
+    count = len(positions)
+    for i in range(len(cvs)):
+        x, y, z = positions[i % count]
+        cvs[i] = om.MPoint(x, y, z)
+    curveFn.setCVPositions(cvs, om.MSpace.kWorld)
+    curveFn.updateCurve()
+
+def createLocator(convexTransform, centerPosition=None):
+    if centerPosition is None:
+        centerPosition = cmd.objectCenter(convexTransform, gl=True)
+        cmd.hide(convexTransform)
     ropelocator = cmd.spaceLocator(p=centerPosition, n='RopeHandle',a=True)
     cmd.xform(ropelocator, cp=1)
     return ropelocator
@@ -519,7 +1697,18 @@ def additionalDeformers(_,profile):
     # cmd.hide(taperM[1])
 
 
-ropeTool = RopeTool()
-
-
-
+# kept across reload() so show() can still tear the previous instance down
+ropeTool = globals().get("ropeTool")
+
+def show():
+    # Entry point for shelf buttons: import RopeTool; RopeTool.show()
+    # Reuses the running tool while its window is open, otherwise the old instance is torn
+    # down and a new one restores the systems from the scene.
+    global ropeTool
+    if ropeTool is not None and cmd.window(ropeTool.window, exists=True):
+        cmd.showWindow(ropeTool.window)
+        return ropeTool
+    if ropeTool is not None:
+        ropeTool.teardown()
+    ropeTool = RopeTool()
+    return ropeTool
@@ -0,0 +1,311 @@
+import numpy as np
+import pytest
+
+import RopeGeometry as geo
+
+# Maya free geometry, runs with plain NumPy and SciPy
+
+
+def boxHull(size=1.0):
+    corners = np.array(np.meshgrid((-size, size), (-size, size), (-size, size))).reshape(3, -1).T
+    return geo.computeHull(corners)
+
+def sphereHull(count=2000, seed=0):
+    points = np.random.default_rng(seed).standard_normal((count, 3))
+    return geo.computeHull(points / np.linalg.norm(points, axis=1)[:, None])
+
+def inside(points, equations, tolerance=1e-9):
+    return np.all(points @ equations[:, :3].T + equations[:, 3] <= tolerance, axis=1)
+
+
+# projection
+
+def test_intersect_box_faces():
+    hull = boxHull()
+    origins = np.array([[5.0, 0.2, -0.3], [-4.0, 0.5, 0.5], [0.1, 0.0, 7.0]])
+    directions = np.array([[-1.0, 0.0, 0.0], [2.0, 0.0, 0.0], [0.0, 0.0, -0.5]])
+    hitPoints, hits = geo.intersectConvex(origins, directions, hull.equations)
+    assert hits.all()
+    np.testing.assert_allclose(hitPoints, [[1.0, 0.2, -0.3], [-1.0, 0.5, 0.5], [0.1, 0.0, 1.0]], atol=1e-12)
+
+def test_intersect_from_inside_exits():
+    hull = boxHull()
+    hitPoints, hits = geo.intersectConvex([[0.0, 0.0, 0.0]], [[0.0, 1.0, 0.0]], hull.equations)
+    assert hits.all()
+    np.testing.assert_allclose(hitPoints, [[0.0, 1.0, 0.0]], atol=1e-12)
+
+def test_intersect_misses():
+    hull = boxHull()
+    origins = np.array([[5.0, 2.0, 0.0],     # passes above the box
+                        [5.0, 0.0, 0.0],     # points away from it
+                        [5.0, 1.5, 0.0],     # parallel to the top face, outside it
+                        [50.0, 0.0, 0.0]])   # hits beyond maxParam
+    directions = np.array([[-1.0, 0.0, 0.0], [1.0, 0.0, 0.0], [-1.0, 0.0, 0.0], [-1.0, 0.0, 0.0]])
+    hitPoints, hits = geo.intersectConvex(origins, directions, hull.equations, maxParam=10.0)
+    assert not hits.any()
+    np.testing.assert_array_equal(hitPoints, origins)
+
+def test_project_ring_onto_sphere():
+    hull = sphereHull()
+    ring = geo.ringStart(hull, 32, 0.3)
+    hitPoints, hits = geo.projectRing(ring, hull.equations, hull.center)
+    assert hits.all()
+    # on the hull surface, at the ring height and in the cv's direction from the axis
+    distances = hitPoints @ hull.equations[:, :3].T + hull.equations[:, 3]
+    np.testing.assert_allclose(distances.max(axis=1), 0.0, atol=1e-9)
+    np.testing.assert_allclose(hitPoints[:, 1], 0.3)
+    before = ring[:, [0, 2]] - hull.center[[0, 2]]
+    after = hitPoints[:, [0, 2]] - hull.center[[0, 2]]
+    np.testing.assert_allclose(before[:, 0] * after[:, 1] - before[:, 1] * after[:, 0], 0.0, atol=1e-9)
+    radius = np.linalg.norm(hitPoints - [hull.center[0], 0.3, hull.center[2]], axis=1)
+    assert np.all((radius > 0.9 * np.sqrt(1 - 0.3 ** 2)) & (radius < np.sqrt(1 - 0.3 ** 2) + 1e-9))
+
+def test_project_ring_off_the_hull_misses():
+    hull = boxHull()
+    ring = geo.ringStart(hull, 14, 3.0)
+    hitPoints, hits = geo.projectRing(ring, hull.equations, hull.center)
+    assert not hits.any()
+
+def test_intersect_matches_brute_force_half_spaces():
+    # First point along each ray inside every half-space, found by stepping the ray
+    hull = sphereHull(200, seed=1)
+    random = np.random.default_rng(2)
+    origins = random.uniform(-3, 3, (60, 3))
+    targets = random.uniform(-1.2, 1.2, (60, 3))
+    directions = targets - origins
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    hitPoints, hits = geo.intersectConvex(origins, directions, hull.equations, maxParam=10.0)
+    assert hits.any() and not hits.all()
+
+    params = np.linspace(0.0, 10.0, 5001)
+    step = params[1] - params[0]
+    for origin, direction, hitPoint, hit in zip(origins, directions, hitPoints, hits):
+        samples = origin + params[:, None] * direction
+        within = inside(samples, hull.equations)
+        if within[0]:
+            # starts inside, the hit is where the ray leaves
+            last = np.flatnonzero(within)[-1]
+            assert hit
+            assert abs(np.linalg.norm(hitPoint - origin) - params[last]) <= step * 1.01
+        elif within.any():
+            first = np.flatnonzero(within)[0]
+            assert hit
+            assert abs(np.linalg.norm(hitPoint - origin) - params[first]) <= step * 1.01
+        else:
+            # a ray only grazing the hull between two samples may still report a hit
+            assert not hit or inside(hitPoint[None], hull.equations, 1e-6)[0]
+
+
+# cross-section cache
+
+def prismHull(sides=7, height=4.0):
+    angles = np.linspace(0, 2 * np.pi, sides, endpoint=False)
+    ring = np.column_stack([np.cos(angles), np.zeros(sides), np.sin(angles) * 0.6])
+    return geo.computeHull(np.concatenate([ring, ring + [0.0, height, 0.0]]))
+
+def test_slice_cache_matches_projection_on_prism():
+    # every slice of a prism is the same polygon, so blending slices is exact
+    hull = prismHull()
+    cache = geo.HullSliceCache(hull)
+    ring = np.concatenate([geo.ringStart(hull, 14, height) for height in (0.3, 1.7, 3.9)])
+    expected, expectedHits = geo.projectRing(ring, hull.equations, hull.center)
+    hitPoints, hits = cache.project(ring)
+    np.testing.assert_array_equal(hits, expectedHits)
+    np.testing.assert_allclose(hitPoints, expected, atol=1e-9)
+
+def test_slice_cache_close_to_projection_on_sphere():
+    hull = sphereHull()
+    cache = geo.HullSliceCache(hull)
+    ring = np.concatenate([geo.ringStart(hull, 32, height) for height in np.linspace(-0.9, 0.9, 7)])
+    expected, expectedHits = geo.projectRing(ring, hull.equations, hull.center)
+    hitPoints, hits = cache.project(ring)
+    assert hits.all() and expectedHits.all()
+    assert np.abs(hitPoints - expected).max() < 1e-3
+
+def test_slice_cache_misses_off_the_hull():
+    hull = prismHull()
+    cache = geo.HullSliceCache(hull)
+    ring = geo.ringStart(hull, 14, 5.0)
+    hitPoints, hits = cache.project(ring)
+    assert not hits.any()
+    np.testing.assert_array_equal(hitPoints, ring)
+
+def test_slice_cache_reuses_visited_heights():
+    hull = sphereHull()
+    cache = geo.HullSliceCache(hull)
+    ring = geo.ringStart(hull, 14, 0.25)
+    cache.project(ring)
+    misses = cache.misses
+    cache.project(ring)
+    assert cache.misses == misses
+    assert cache.hits >= 2
+
+def test_slice_cache_stays_within_byte_bound():
+    hull = sphereHull()
+    cache = geo.HullSliceCache(hull, maxBytes=4096)
+    for height in np.linspace(-0.95, 0.95, 200):
+        cache.project(geo.ringStart(hull, 8, height))
+    assert cache.bytes <= 4096 or len(cache.slices) == 1
+    assert cache.bytes == sum(0 if equations is None else equations.nbytes for equations in cache.slices.values())
+
+
+# incremental hull updates
+
+def sameHull(a, b, tolerance=1e-9):
+    return inside(a.points, b.equations, tolerance).all() and inside(b.points, a.equations, tolerance).all()
+
+def scanPoints(count=4000, seed=3):
+    random = np.random.default_rng(seed)
+    points = random.standard_normal((count, 3))
+    return points / np.linalg.norm(points, axis=1)[:, None] * random.uniform(0.8, 1.0, (count, 1))
+
+def test_moved_vertices():
+    points = scanPoints()
+    moved = points.copy()
+    moved[[5, 17]] += 0.01
+    np.testing.assert_array_equal(geo.movedVertices(points, moved), [5, 17])
+    assert geo.movedVertices(points, points[:-1]) is None
+    assert geo.movedVertices(None, points) is None
+
+def test_update_hull_interior_move_keeps_hull():
+    points = scanPoints()
+    hull = geo.computeHull(points)
+    interior = np.setdiff1d(np.arange(len(points)), hull.sourceIndices)[:20]
+    moved = points.copy()
+    moved[interior] *= 0.5
+    assert geo.updateHull(hull, moved, geo.movedVertices(points, moved)) is None
+
+def test_update_hull_outward_move_matches_rebuild():
+    points = scanPoints()
+    hull = geo.computeHull(points)
+    interior = np.setdiff1d(np.arange(len(points)), hull.sourceIndices)[:20]
+    moved = points.copy()
+    moved[interior] *= 1.3
+    updated = geo.updateHull(hull, moved, geo.movedVertices(points, moved))
+    assert updated is not None
+    assert sameHull(updated, geo.computeHull(moved))
+    assert inside(moved, updated.equations).all()
+
+def test_update_hull_inward_hull_vertex_matches_rebuild():
+    # pulling hull vertices in uncovers points that were interior
+    points = scanPoints()
+    hull = geo.computeHull(points)
+    hullVertices = np.asarray(hull.sourceIndices)[:15]
+    moved = points.copy()
+    moved[hullVertices] *= 0.3
+    updated = geo.updateHull(hull, moved, geo.movedVertices(points, moved))
+    assert updated is not None
+    assert sameHull(updated, geo.computeHull(moved))
+    assert inside(moved, updated.equations).all()
+
+def test_changed_height_range_covers_the_edit():
+    points = scanPoints(6000)
+    hull = geo.computeHull(points)
+    band = (points[:, 1] > 0.2) & (points[:, 1] < 0.4)
+    moved = points.copy()
+    moved[band] *= [1.2, 1.0, 1.2]
+    updated = geo.updateHull(hull, moved, geo.movedVertices(points, moved))
+    low, high = geo.changedHeightRange(hull, updated)
+    assert low <= 0.2 + 1e-9 and high >= 0.4 - 0.05
+    # rays outside the reported span hit both hulls in the same place
+    ring = np.concatenate([geo.ringStart(hull, 16, height) for height in (-0.8, -0.5, 0.8)
+                           if height < low or height > high])
+    before, _ = geo.projectRing(ring, hull.equations, hull.center)
+    after, _ = geo.projectRing(ring, updated.equations, hull.center)
+    np.testing.assert_allclose(before, after, atol=1e-9)
+    assert geo.changedHeightRange(hull, hull) is None
+
+
+# adaptive ring fitting
+
+def closedDistance(points, polyline):
+    # distance of every point to a closed polyline
+    a = polyline
+    ab = np.roll(polyline, -1, axis=0) - a
+    ap = points[:, None, :] - a[None]
+    t = np.clip(np.einsum('pkd,kd->pk', ap, ab) / np.einsum('kd,kd->k', ab, ab), 0, 1)
+    return np.linalg.norm(ap - t[..., None] * ab[None], axis=2).min(axis=1)
+
+def ringError(polygon, cvs):
+    # both ways, so corners the curve cuts off count too
+    curve = geo.evaluatePeriodicBSpline(cvs, 64)
+    return max(closedDistance(curve, polygon).max(), closedDistance(polygon, curve).max())
+
+def ellipse(count=200, a=1.0, b=1.0):
+    angles = np.linspace(0, 2 * np.pi, count, endpoint=False)
+    return np.column_stack([a * np.cos(angles), b * np.sin(angles)])
+
+def dShape(count=100):
+    arc = ellipse(2 * count)[:count + 1]
+    return np.vstack([arc, [[-1.0, -0.5], [0.0, -0.5], [1.0, -0.5]]])
+
+def test_fit_square_keeps_sharp_corners():
+    square = np.array([[-1.0, -1.0], [1.0, -1.0], [1.0, 1.0], [-1.0, 1.0]])
+    cvs, deviation = geo.fitAdaptiveRing(square, 1e-3)
+    assert len(cvs) == 12
+    assert deviation < 1e-9
+    assert ringError(square, cvs) < 1e-6
+
+@pytest.mark.parametrize("polygon", [ellipse(), ellipse(a=3.0, b=0.5), dShape()],
+                         ids=["circle", "ellipse", "d"])
+@pytest.mark.parametrize("tolerance", [1e-2, 1e-3])
+def test_fit_stays_within_tolerance(polygon, tolerance):
+    cvs, deviation = geo.fitAdaptiveRing(polygon, tolerance, maxCount=256)
+    assert deviation <= tolerance
+    # measured independently of splineDeviation, with a little slack for its sampling
+    assert ringError(polygon, cvs) <= tolerance * 1.05
+    # cvs sit on the slice boundary
+    assert closedDistance(cvs, polygon).max() < 1e-9
+
+def test_fit_needs_no_more_cvs_than_uniform():
+    polygon = ellipse(a=3.0, b=0.5)
+    tolerance = 1e-2
+    cvs, _ = geo.fitAdaptiveRing(polygon, tolerance, maxCount=256)
+    closed = np.vstack([polygon, polygon[:1]])
+    cumulative = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(closed, axis=0), axis=1))])
+    def uniformError(count):
+        params = np.linspace(0, cumulative[-1], count, endpoint=False)
+        uniform = np.column_stack([np.interp(params, cumulative, closed[:, 0]),
+                                   np.interp(params, cumulative, closed[:, 1])])
+        return ringError(polygon, uniform)
+
+    # uniform error shrinks with the count on a smooth slice, bisect the smallest that fits
+    low, high = 4, 256
+    while low < high:
+        middle = (low + high) // 2
+        if uniformError(middle) <= tolerance:
+            high = middle
+        else:
+            low = middle + 1
+    assert uniformError(low) <= tolerance
+    assert len(cvs) <= low
+
+
+# hull disk cache
+
+def test_disk_cache_round_trip(tmp_path):
+    cache = geo.HullDiskCache(str(tmp_path))
+    points = scanPoints(500)
+    hull = geo.cachedHull(points, cache=cache)
+    cached = geo.cachedHull(points, cache=cache)
+    assert cached.cached
+    np.testing.assert_array_equal(cached.points, hull.points)
+    np.testing.assert_array_equal(cached.equations, hull.equations)
+
+@pytest.mark.parametrize("damage", ["truncated", "empty"])
+def test_disk_cache_rebuilds_damaged_entries(tmp_path, damage):
+    cache = geo.HullDiskCache(str(tmp_path))
+    points = scanPoints(500)
+    hull = geo.cachedHull(points, cache=cache)
+    path = cache.path(cache.key(np.ascontiguousarray(points), "exact", None, None))
+    with open(path, "rb") as cacheFile:
+        data = cacheFile.read()
+    with open(path, "wb") as cacheFile:
+        cacheFile.write(data[:len(data) // 2] if damage == "truncated" else b"")
+
+    with pytest.warns(UserWarning, match="damaged"):
+        rebuilt = geo.cachedHull(points, cache=cache)
+    assert not getattr(rebuilt, "cached", False)
+    np.testing.assert_array_equal(rebuilt.points, hull.points)
+    # the damaged entry was replaced by a good one
+    assert geo.cachedHull(points, cache=cache).cached